@@ -1,13 +1,28 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
 from openai import OpenAI
 from selenium import webdriver
 
 api_key = os.getenv("OPENAI_API_KEY")
 client = OpenAI(api_key=api_key)
-Driver = webdriver.Chrome()
+
+# Chrome takes seconds to start, so launch it in the background while the
+# user types the task and the model answers; tools wait for it on first use
+_startup = ThreadPoolExecutor(max_workers=1)
+_driver_future = _startup.submit(webdriver.Chrome)
+
+def _report_startup_error(future):
+    # say so as soon as the launch fails, not only when a tool needs the driver
+    if future.exception() is not None:
+        print(f"\n[Chrome failed to start] {future.exception()!r}", flush=True)
+
+_driver_future.add_done_callback(_report_startup_error)
+
+def get_driver():
+    return _driver_future.result()
 
 def goto_url(url: str):
-    Driver.get(url)
+    get_driver().get(url)
     return {"status": "navigated", "url": url}
 
 tools = [
@@ -28,11 +43,23 @@ tools = [
 
 task = input("Enter your search task: ")
 
-response = client.responses.create(
+# stream the reply so text shows up as it's generated instead of after the
+# whole response is done (Chrome keeps starting in the background meanwhile)
+stream = client.responses.create(
     model="gpt-5-nano",
     input="You are a ai browser agent. Complete the user's task using browser tools.",
     tools=tools,
-    tool_choice="auto"
+    tool_choice="auto",
+    stream=True
 )
 
-input(response.output_text)
\ No newline at end of file
+for event in stream:
+    if event.type == "response.output_text.delta":
+        print(event.delta, end="", flush=True)
+
+input()
+
+# wait for the launch before exiting, so a failed Chrome start still
+# raises here like it did when Chrome was started at import
+_startup.shutdown()
+get_driver()
@@ -6,48 +6,62 @@ import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 import time
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 # --- Config ---
 GRID_SIZE = 50
-LastGrid = []
+OCR_CONFIG = "--oem 1 --psm 6"  # LSTM engine only, one uniform text block
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")  # tesseract's OpenMP threads just contend on a single frame
+UI_LOOKUP_WORKERS = 8
+UIA_NAME_MATCH = 0x1 | 0x2  # PropertyConditionFlags_IgnoreCase | PropertyConditionFlags_MatchSubstring
+LastGrid = np.empty((0, 2), dtype=np.int32)
+_grid_cache = {}  # (w, h, grid_size) -> cell centers
 
 # --- Screenshot + Vision ---
 def capture_screenshot(path='screenshot.png'):
     pyautogui.screenshot(path)
     return path
 
-def ocr_image(path):
-    img = cv2.imread(path)
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    text = pytesseract.image_to_string(gray)
+def ocr_image(img):
+    # accepts a file path or a raw BGR/BGRA frame (e.g. straight from mss)
+    if isinstance(img, str):
+        img = cv2.imread(img)
+    if img.ndim == 3:
+        code = cv2.COLOR_BGRA2GRAY if img.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+        img = cv2.cvtColor(img, code)
+    thr = cv2.adaptiveThreshold(img, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 10)
+    text = pytesseract.image_to_string(thr, config=OCR_CONFIG)
     return text
 
 # --- Grid Overlay ---
+def grid_centers(w, h, grid_size=GRID_SIZE):
+    # row-major (N, 2) cell centers, computed once per resolution
+    key = (w, h, grid_size)
+    if key not in _grid_cache:
+        xs = np.arange(0, w, grid_size, dtype=np.int32) + grid_size // 2
+        ys = np.arange(0, h, grid_size, dtype=np.int32) + grid_size // 2
+        _grid_cache[key] = np.stack(np.meshgrid(xs, ys), axis=-1).reshape(-1, 2)
+    return _grid_cache[key]
+
 def overlay_grid(image_path):
     global LastGrid
     img = Image.open(image_path).convert("RGBA")
     w, h = img.size
-    overlay = Image.new("RGBA", img.size, (0,0,0,0))
-    draw = ImageDraw.Draw(overlay)
+    # draw straight onto the screenshot (alpha blended in place), no separate layer to composite
+    draw = ImageDraw.Draw(img, "RGBA")
     
     font = ImageFont.load_default()
-    cell_index = 0
-    LastGrid = []
-    for y in range(0, h, GRID_SIZE):
-        for x in range(0, w, GRID_SIZE):
-            center_x = x + GRID_SIZE // 2
-            center_y = y + GRID_SIZE // 2
-            LastGrid.append((center_x, center_y))
-            draw.text((center_x-5, center_y-5), str(cell_index), fill=(255,255,255,255), font=font)
-    combined = Image.alpha_composite(img, overlay)
+    LastGrid = grid_centers(w, h)
+    for cell_index, (center_x, center_y) in enumerate(LastGrid.tolist()):
+        draw.text((center_x-5, center_y-5), str(cell_index), fill=(255,255,255,255), font=font)
     output_path = "grid_overlay.png"
-    combined.save(output_path)
+    img.save(output_path)
     return output_path
 
 # --- Grid Click Fallback ---
 def click_grid(index):
     try:
-        x, y = LastGrid[index]
+        x, y = LastGrid[index].tolist()
         pyautogui.moveTo(x, y)
         pyautogui.click()
         return f"Clicked grid cell {index} at ({x},{y})"
@@ -55,24 +69,55 @@ def click_grid(index):
         return "Grid index out of range"
 
 # --- UI Automation ---
+def uia_client():
+    # the raw IUIAutomation client (a singleton); the package's `import *`
+    # skips underscore names, so it's reached through the uiautomation submodule
+    return auto.uiautomation._AutomationClient.instance().IUIAutomation
+
 def find_ui_elements_by_name(name):
-    matches = []
-    desktop = auto.GetRootControl()
-    for ctrl, _ in desktop.GetChildren():
-        if name.lower() in ctrl.Name.lower():
-            matches.append(ctrl)
-    return matches
+    # UIA matches the name (case-insensitive substring) itself, so only hits come back over COM
+    cond = uia_client().CreatePropertyConditionEx(auto.PropertyId.NameProperty, name, UIA_NAME_MATCH)
+    found = auto.GetRootControl().Element.FindAll(auto.TreeScope.Children, cond)
+    return [auto.Control.CreateControlFromElement(found.GetElement(i)) for i in range(found.Length)]
+
+def control_center(ctrl):
+    rect = ctrl.BoundingRectangle
+    return (rect.left + rect.right) // 2, (rect.top + rect.bottom) // 2
+
+def _find_in_thread(name):
+    # worker threads need their own COM init before touching UIA; Controls
+    # can't outlive it, so only the first match's click point leaves here
+    with auto.UIAutomationInitializerInThread():
+        matches = find_ui_elements_by_name(name)
+        return control_center(matches[0]) if matches else None
+
+def find_first_ui_match(words):
+    # look every word up at once (UIA calls release the GIL), but keep the
+    # old priority: the earliest word with a match wins. Returns
+    # (word, (x, y)) or (None, None)
+    with ThreadPoolExecutor(max_workers=UI_LOOKUP_WORKERS) as ex:
+        futures = [(word, ex.submit(_find_in_thread, word)) for word in words]
+        for word, fut in futures:
+            point = fut.result()
+            if point is not None:
+                for _, other in futures:
+                    other.cancel()
+                return word, point
+    return None, None
+
+def click_point(point, name):
+    x, y = point
+    pyautogui.moveTo(x, y)
+    pyautogui.click()
+    return f"Clicked UI element '{name}' at ({x},{y})"
+
+def click_control(ctrl, name):
+    return click_point(control_center(ctrl), name)
 
 def click_ui_element_by_name(name):
     matches = find_ui_elements_by_name(name)
     if matches:
-        ctrl = matches[0]
-        rect = ctrl.BoundingRectangle
-        x = (rect.left + rect.right) // 2
-        y = (rect.top + rect.bottom) // 2
-        pyautogui.moveTo(x, y)
-        pyautogui.click()
-        return f"Clicked UI element '{name}' at ({x},{y})"
+        return click_control(matches[0], name)
     else:
         return f"No UI element found with name: {name}"
 
@@ -98,13 +143,11 @@ def run_task_loop():
         # Step 1: Try automation
         action_words = user_task.lower().split()
         did_action = False
-        for word in action_words:
-            print(f"Trying UI automation for '{word}'...")
-            result = click_ui_element_by_name(word)
-            if "Clicked" in result:
-                print(result)
-                did_action = True
-                break
+        print(f"Trying UI automation for {action_words}...")
+        word, point = find_first_ui_match(action_words)
+        if point is not None:
+            print(click_point(point, word))
+            did_action = True
 
         # Step 2: If that fails, do OCR vision
         if not did_action:
@@ -1,13 +1,33 @@
 import os
 import time
 import json
+import copy
 import base64
+import asyncio
+import inspect
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from io import BytesIO
 from typing import List, Tuple
 
+import cv2
+import mss
+import numpy as np
 import pyautogui
 from PIL import Image, ImageDraw, ImageFont
-from openai import OpenAI
+from openai import AsyncOpenAI
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None  # optional: grid labels fall back to NumPy slice pastes
+
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGRX
+    _tj = TurboJPEG()
+except (ImportError, OSError):
+    _tj = None  # optional: fall back to cv2's JPEG encoder
 
 
 # =====================
@@ -21,88 +41,280 @@ api_key = os.getenv("OPENAI_API_KEY")
 if not api_key:
     raise RuntimeError("Please set the OPENAI_API_KEY environment variable (your OpenAI API key).")
 
-client = OpenAI(api_key=api_key)
+client = AsyncOpenAI(api_key=api_key)
 
 GRID_SIZE = 50  # size of each numbered grid cell in pixels
-LastGrid: List[Tuple[int, int]] = []  # index -> (center_x, center_y)
+GRID_LINE_COLOR = (255, 0, 0, 120)  # RGBA
+GRID_LINE_WIDTH = 1
+GRID_TEXT_COLOR = (255, 0, 0, 200)  # RGBA
+GRID_FONT_SIZE = 20
+LastGrid: np.ndarray = np.empty((0, 2), dtype=np.int32)  # index -> (center_x, center_y)
+_grid_cache: dict[tuple[int, int, int], np.ndarray] = {}  # (w, h, grid_size) -> cell centers
+
+VISION_IMAGE_FORMAT = "jpeg"  # "png" sends the lossless overlay instead
+JPEG_QUALITY = 70
+VISION_MAX_SIDE = 1280  # longest side sent to the vision model; clicks still use full-res cell centers
+MIN_LABEL_PX = 12  # downscaling never shrinks the cell numbers below this, or the model can't read them
+PNG_PALETTE_COLORS = 256  # PNG payload is quantized to an 8-bit palette; 0 keeps full color
+
+DHASH_SIZE = 16
+_screen_dirty = True
+_last_describe = None  # (dhash, query args, parsed result)
+
+_io_pool = ThreadPoolExecutor(max_workers=2)  # background screenshot writes; paths are "eventually written"
+
+_sct = mss.mss()  # reused screen grabber, avoids re-creating GDI handles per shot
 
 
 # =====================
 # Your grid + screenshot utilities (AI-ready)
 # =====================
 
+def _grab_bgra() -> np.ndarray:
+    """
+    Grab the primary monitor with mss and return an (H, W, 4) BGRA uint8
+    array that views the captured frame directly (no extra copy).
+    """
+    raw = _sct.grab(_sct.monitors[1])
+    return np.frombuffer(raw.raw, dtype=np.uint8).reshape(raw.height, raw.width, 4)
+
+
 def Screenshot() -> Image.Image:
     """
     Take a live screenshot of the current screen and return it as a PIL RGBA image.
     Use GridScreenshot() if you want the numbered grid overlay + LastGrid filled.
     """
-    img = pyautogui.screenshot()
-    return img.convert("RGBA")
+    return _bgra_to_image(_grab_bgra())
 
 
-def AddGridToImg(img: Image.Image) -> Image.Image:
+def _bgra_to_image(frame: np.ndarray) -> Image.Image:
     """
-    Overlay a numbered grid on top of `img` and populate LastGrid with the
-    center coordinates of each cell.
-
-    Cell indexing:
-        0 = top-left cell, increasing left-to-right, row-by-row.
+    Convert a BGRA frame to an opaque PIL RGBA image (cv2 does the channel
+    shuffle; mss leaves the alpha byte undefined, so it is forced to 255).
     """
-    global LastGrid
-    LastGrid = []  # reset mapping
-
-    grid_size = GRID_SIZE
-    line_color = (255, 0, 0, 120)
-    line_width = 1
-    text_color = (255, 0, 0, 200)
-    font_size = 20
+    rgba = cv2.cvtColor(frame, cv2.COLOR_BGRA2RGBA)
+    rgba[..., 3] = 255
+    return Image.fromarray(rgba, "RGBA")
 
-    w, h = img.size
-    overlay = Image.new("RGBA", img.size, (0, 0, 0, 0))
-    draw = ImageDraw.Draw(overlay)
 
-    # load font
+def _grid_centers(w: int, h: int, grid_size: int) -> np.ndarray:
+    """
+    Return the (N, 2) int32 array of cell centers for a w x h image, in
+    row-major cell order. Memoized per resolution since it rarely changes.
+    """
+    key = (w, h, grid_size)
+    centers = _grid_cache.get(key)
+    if centers is None:
+        xs = np.arange(0, w, grid_size, dtype=np.int32) + grid_size // 2
+        ys = np.arange(0, h, grid_size, dtype=np.int32) + grid_size // 2
+        centers = np.stack(np.meshgrid(xs, ys), axis=-1).reshape(-1, 2)
+        centers.flags.writeable = False  # shared between calls
+        _grid_cache[key] = centers
+    return centers
+
+
+@lru_cache(maxsize=None)
+def _grid_font(font_size: int) -> ImageFont.ImageFont:
     try:
-        font = ImageFont.truetype("arial.ttf", font_size)
+        return ImageFont.truetype("arial.ttf", font_size)
     except Exception:
-        font = ImageFont.load_default()
+        return ImageFont.load_default()
+
+
+@lru_cache(maxsize=None)
+def _digit_metrics(font_size: int) -> Tuple[Tuple[int, ...], int, int]:
+    """
+    Advance width of each digit 0-9 plus the shared (top, bottom) ink extent,
+    measured once per font size instead of shaping text for every label.
+    """
+    font = _grid_font(font_size)
+    widths = tuple(max(1, round(font.getlength(d))) for d in "0123456789")
+    _, top, _, bottom = font.getbbox("0123456789")
+    return widths, top, bottom
+
+
+@lru_cache(maxsize=None)
+def _digit_glyphs(font_size: int, color: Tuple[int, int, int, int]) -> List[np.ndarray]:
+    """
+    Pre-render the digits 0-9 once as small RGBA tiles so the grid labels can
+    be pasted with NumPy slices instead of calling PIL for every cell.
+    """
+    font = _grid_font(font_size)
+    widths, top, bottom = _digit_metrics(font_size)
+
+    glyphs = []
+    for digit, width in zip("0123456789", widths):
+        mask = Image.new("L", (width, bottom), 0)
+        ImageDraw.Draw(mask).text((0, 0), digit, fill=255, font=font)
+        alpha = np.asarray(mask, dtype=np.uint16)[top:bottom]
+
+        tile = np.empty(alpha.shape + (4,), dtype=np.uint8)
+        tile[..., :3] = color[:3]
+        tile[..., 3] = alpha * color[3] // 255
+        glyphs.append(tile)
+    return glyphs
+
+
+@lru_cache(maxsize=None)
+def _label_tile(index: int, font_size: int, color: Tuple[int, int, int, int]) -> np.ndarray:
+    """
+    RGBA tile for the number `index`, built from the cached digit glyphs.
+    """
+    glyphs = _digit_glyphs(font_size, color)
+    return np.hstack([glyphs[int(c)] for c in str(index)])
+
+
+def _paste_tile(dst: np.ndarray, tile: np.ndarray, x: int, y: int) -> None:
+    """
+    Paste `tile` with its top-left corner at (x, y), clipped to `dst`.
+    Fully transparent tile pixels leave `dst` untouched.
+    """
+    th, tw = tile.shape[:2]
+    h, w = dst.shape[:2]
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + tw, w), min(y + th, h)
+    if x1 <= x0 or y1 <= y0:
+        return
+
+    src = tile[y0 - y:y1 - y, x0 - x:x1 - x]
+    np.copyto(dst[y0:y1, x0:x1], src, where=src[..., 3:4] > 0)
+
+
+@lru_cache(maxsize=None)
+def _packed_labels(n: int, font_size: int, color: Tuple[int, int, int, int]):
+    """
+    Pack everything the label kernel needs for cells 0..n-1:
+    glyphs (10, gh, max_w, 4), digit widths (10,), per-cell digits (n, D)
+    padded with -1, and per-cell label widths (n,).
+    """
+    tiles = _digit_glyphs(font_size, color)
+    widths = np.array([t.shape[1] for t in tiles], dtype=np.int32)
+    glyphs = np.zeros((10, tiles[0].shape[0], widths.max(), 4), dtype=np.uint8)
+    for d, tile in enumerate(tiles):
+        glyphs[d, :, :tile.shape[1]] = tile
+
+    idx = np.arange(n, dtype=np.int64)
+    n_digits = np.ones(n, dtype=np.int64)
+    rest = idx // 10
+    while rest.any():
+        n_digits += rest > 0
+        rest //= 10
+
+    digits = np.full((n, int(n_digits.max(initial=1))), -1, dtype=np.int8)
+    for k in range(digits.shape[1]):
+        power = n_digits - 1 - k  # decimal position of the k-th digit from the left
+        valid = power >= 0
+        digits[valid, k] = idx[valid] // 10 ** power[valid] % 10
+
+    label_w = np.where(digits >= 0, widths[digits], 0).sum(axis=1).astype(np.int32)
+    return glyphs, widths, digits, label_w
+
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _blit_labels(ov, centers, glyphs, widths, digits, label_w):
+        # one cell per prange iteration; glyph pixels with alpha 0 are skipped
+        h, w = ov.shape[0], ov.shape[1]
+        gh = glyphs.shape[1]
+        for i in prange(centers.shape[0]):
+            x = centers[i, 0] - label_w[i] // 2
+            y0 = centers[i, 1] - gh // 2
+            for k in range(digits.shape[1]):
+                d = digits[i, k]
+                if d < 0:
+                    break
+                for gy in range(gh):
+                    py = y0 + gy
+                    if py < 0 or py >= h:
+                        continue
+                    for gx in range(widths[d]):
+                        px = x + gx
+                        if px < 0 or px >= w or glyphs[d, gy, gx, 3] == 0:
+                            continue
+                        for c in range(4):
+                            ov[py, px, c] = glyphs[d, gy, gx, c]
+                x += widths[d]
+else:
+    _blit_labels = None
+
+
+def _swap_rb(color: Tuple[int, int, int, int]) -> Tuple[int, int, int, int]:
+    r, g, b, a = color
+    return (b, g, r, a)
+
+
+def _grid_overlay(w: int, h: int, grid_size: int, bgr: bool) -> np.ndarray:
+    """
+    Build the (H, W, 4) grid overlay (lines + cell numbers) for a w x h frame,
+    in BGRA channel order when `bgr` is set, otherwise RGBA.
+    """
+    line_color = _swap_rb(GRID_LINE_COLOR) if bgr else GRID_LINE_COLOR
+    text_color = _swap_rb(GRID_TEXT_COLOR) if bgr else GRID_TEXT_COLOR
+
+    ov = np.zeros((h, w, 4), dtype=np.uint8)
+
+    # draw grid lines as strided stripe writes into the overlay buffer
+    for offset in range(GRID_LINE_WIDTH):
+        ov[offset::grid_size, :] = line_color
+        ov[:, offset::grid_size] = line_color
+
+    # paste pre-rendered numbers, centered on each cell
+    centers = _grid_centers(w, h, grid_size)
+    if _blit_labels is not None:
+        _blit_labels(ov, centers, *_packed_labels(len(centers), GRID_FONT_SIZE, text_color))
+    else:
+        for cell_index, (center_x, center_y) in enumerate(centers.tolist()):
+            tile = _label_tile(cell_index, GRID_FONT_SIZE, text_color)
+            th, tw = tile.shape[:2]
+            _paste_tile(ov, tile, center_x - tw // 2, center_y - th // 2)
 
-    # draw grid lines
-    for x in range(0, w, grid_size):
-        draw.line((x, 0, x, h), fill=line_color, width=line_width)
+    return ov
 
-    for y in range(0, h, grid_size):
-        draw.line((0, y, w, y), fill=line_color, width=line_width)
 
-    # draw numbers & record centers in LastGrid
-    cell_index = 0
-    for y in range(0, h, grid_size):
-        for x in range(0, w, grid_size):
-            center_x = x + grid_size // 2
-            center_y = y + grid_size // 2
-            text = str(cell_index)
+@lru_cache(maxsize=4)
+def _grid_plan(w: int, h: int, grid_size: int, bgr: bool) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Specialize the grid for one (w, h, grid_size) geometry: build the overlay
+    once and return it premultiplied, along with its inverse alpha, so each
+    frame only needs two cv2 ops.
+    """
+    ov = _grid_overlay(w, h, grid_size, bgr)
+    alpha = np.repeat(ov[..., 3:4], 4, axis=2)
+    premult = cv2.multiply(ov, alpha, scale=1 / 255)
+    premult[..., 3] = ov[..., 3]
+    inv_alpha = cv2.bitwise_not(alpha)
+    return premult, inv_alpha
 
-            # save center for ClickGrid()
-            LastGrid.append((center_x, center_y))
 
-            # get text bounding box
-            bbox = draw.textbbox((0, 0), text, font=font)
-            tw = bbox[2] - bbox[0]
-            th = bbox[3] - bbox[1]
+def _add_grid(frame: np.ndarray, bgr: bool = True) -> np.ndarray:
+    """
+    Composite the numbered grid onto an (H, W, 4) uint8 `frame` in place
+    and refresh LastGrid with the cell centers.
 
-            # draw centered text
-            draw.text(
-                (center_x - tw / 2, center_y - th / 2),
-                text,
-                fill=text_color,
-                font=font,
-            )
+    Blend is the "over" operator with cv2's vectorized arithmetic:
+    frame = frame * (1 - a) + overlay * a, with a = overlay alpha / 255.
+    """
+    global LastGrid
 
-            cell_index += 1
+    h, w = frame.shape[:2]
+    LastGrid = _grid_centers(w, h, GRID_SIZE)
+    premult, inv_alpha = _grid_plan(w, h, GRID_SIZE, bgr)
+    cv2.multiply(frame, inv_alpha, dst=frame, scale=1 / 255)
+    cv2.add(frame, premult, dst=frame)
+    return frame
 
-    base = img.convert("RGBA") if img.mode != "RGBA" else img
-    result = Image.alpha_composite(base, overlay)
-    return result
+
+def AddGridToImg(img: Image.Image) -> Image.Image:
+    """
+    Overlay a numbered grid on top of `img` and populate LastGrid with the
+    center coordinates of each cell.
+
+    Cell indexing:
+        0 = top-left cell, increasing left-to-right, row-by-row.
+    """
+    frame = np.array(img.convert("RGBA"))
+    _add_grid(frame, bgr=False)
+    return Image.fromarray(frame, "RGBA")
 
 
 def GridScreenshot() -> Image.Image:
@@ -115,9 +327,7 @@ def GridScreenshot() -> Image.Image:
       - model gets JSON with numbered_cell_index
       - then calls click_numbered_cell(index) to click.
     """
-    img = Screenshot()
-    result = AddGridToImg(img)
-    return result
+    return _bgra_to_image(_add_grid(_grab_bgra()))
 
 
 def ClickPosition(x: int, y: int) -> dict:
@@ -160,7 +370,7 @@ def ClickGrid(index: int) -> dict:
             "error": f"Grid index {index} out of range (size={len(LastGrid)})",
         }
 
-    x, y = LastGrid[index]
+    x, y = LastGrid[index].tolist()
     base_res = ClickPosition(x, y)
     base_res["action"] = "click_grid"
     base_res["index"] = index
@@ -279,27 +489,121 @@ def Sleep(seconds: float) -> dict:
 # Vision helper using numbered grid
 # =====================
 
-def _take_grid_screenshot_for_ai():
+def _vision_scale(w: int, h: int) -> float:
+    """
+    Factor a w x h grid frame is resized by before it goes to the model:
+    down to VISION_MAX_SIDE, but no further than keeps the GRID_FONT_SIZE
+    cell numbers at MIN_LABEL_PX (the grid is drawn at full resolution).
+    """
+    return min(1.0, max(VISION_MAX_SIDE / max(w, h), MIN_LABEL_PX / GRID_FONT_SIZE))
+
+
+def _encode_for_vision(frame: np.ndarray, downscale: bool = True) -> Tuple[bytes, str]:
     """
-    Take a numbered-grid screenshot (updates LastGrid),
-    save it, and return (path, width, height, base64_png).
+    Encode a BGRA grid frame for the vision model and return (bytes, mime type).
+    libjpeg-turbo reads the BGRA buffer as-is; the cv2 paths only drop the
+    alpha byte first. PIL is only used to build the palette PNG.
+    With `downscale`, the frame is first resized by _vision_scale.
     """
-    img = GridScreenshot()
+    h, w = frame.shape[:2]
+    scale = _vision_scale(w, h) if downscale else 1.0
+    if scale < 1.0:
+        frame = cv2.resize(frame, (round(w * scale), round(h * scale)), interpolation=cv2.INTER_AREA)
+
+    if VISION_IMAGE_FORMAT == "png" and PNG_PALETTE_COLORS:
+        # the grid labels survive a palette fine, and an indexed PNG is ~4x smaller
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGRA2RGB)
+        img = Image.fromarray(rgb).quantize(PNG_PALETTE_COLORS, method=Image.Quantize.FASTOCTREE)
+        buffer = BytesIO()
+        img.save(buffer, format="PNG", compress_level=1)
+        return buffer.getvalue(), "image/png"
+
+    if VISION_IMAGE_FORMAT == "png":
+        bgr = cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR)
+        _, buf = cv2.imencode(".png", bgr, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+        return buf.tobytes(), "image/png"
+
+    if _tj is not None:
+        return _tj.encode(frame, quality=JPEG_QUALITY, pixel_format=TJPF_BGRX), "image/jpeg"
+
+    bgr = cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR)
+    _, buf = cv2.imencode(".jpg", bgr, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+    return buf.tobytes(), "image/jpeg"
+
+
+def _write_file(path: str, data: bytes) -> None:
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def _write_screen(path: str, frame: np.ndarray, data: bytes | None) -> None:
+    """
+    Write a grid screenshot to disk. `data` is the vision encoding when that
+    is already full resolution; None means the model got a downscaled copy,
+    so the full-resolution frame is encoded here, on the I/O pool.
+    """
+    if data is None:
+        data, _ = _encode_for_vision(frame, downscale=False)
+    _write_file(path, data)
+
+
+def _dhash(frame: np.ndarray) -> bytes:
+    """
+    Difference hash of a BGRA frame: DHASH_SIZE x DHASH_SIZE bits of "is
+    this pixel brighter than its right neighbour" on a tiny grayscale
+    thumbnail.
+    """
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGRA2GRAY)
+    small = cv2.resize(gray, (DHASH_SIZE + 1, DHASH_SIZE), interpolation=cv2.INTER_AREA)
+    return np.packbits(small[:, 1:] > small[:, :-1]).tobytes()
+
+
+def _changes_screen(fn):
+    """
+    Mark the screen dirty after an action tool runs, so the next
+    capture_and_describe_screen can't be served from the cache.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        global _screen_dirty
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _screen_dirty = True
+    return wrapper
+
+
+def _grab_and_hash() -> Tuple[np.ndarray, bytes]:
+    """
+    Grab the screen and dHash it, before anything is drawn on it.
+    """
+    frame = _grab_bgra()
+    return frame, _dhash(frame)
+
+
+def _take_grid_screenshot_for_ai(frame: np.ndarray):
+    """
+    Draw the numbered grid on a grabbed frame (updates LastGrid) and encode it.
+    Returns (path, width, height, disk_bytes, frame, base64_image, mime_type);
+    writing `path` (_write_screen with disk_bytes and frame) is left to the caller.
+    """
+    frame = _add_grid(frame)
     ts = int(time.time())
-    filename = f"screen_{ts}.png"
-    img.save(filename, "PNG")
 
-    buffer = BytesIO()
-    img.save(buffer, format="PNG")
-    b64 = base64.b64encode(buffer.getvalue()).decode("utf-8")
+    # encode once and reuse the bytes for disk + base64, unless the model's
+    # copy is downscaled: the file on disk stays full resolution
+    data, mime = _encode_for_vision(frame)
+    filename = f"screen_{ts}.{'png' if mime == 'image/png' else 'jpg'}"
+    b64 = base64.b64encode(data).decode("utf-8")
 
-    w, h = img.size
-    return filename, w, h, b64
+    h, w = frame.shape[:2]
+    disk_data = data if _vision_scale(w, h) >= 1.0 else None
+    return filename, w, h, disk_data, frame, b64, mime
 
 
-def capture_and_describe_screen(task_hint: str | None = None,
-                                coarse_grid_rows: int = 3,
-                                coarse_grid_cols: int = 3):
+async def capture_and_describe_screen(task_hint: str | None = None,
+                                      coarse_grid_rows: int = 3,
+                                      coarse_grid_cols: int = 3):
     """
     Core vision tool.
 
@@ -312,6 +616,12 @@ def capture_and_describe_screen(task_hint: str | None = None,
          * your fine numbered grid (cell indices drawn on the image).
     3. Returns structured JSON the main agent can reason over.
 
+    Capture + encode run in a worker thread, and the screenshot file is
+    written in the background (it may land shortly after this returns).
+    If no action tool has run since the last description, the screen's
+    dHash is unchanged and the arguments match, the previous answer is
+    returned without drawing, encoding, saving or calling the model.
+
     Returns JSON like:
     {
       "summary": "...",
@@ -332,14 +642,30 @@ def capture_and_describe_screen(task_hint: str | None = None,
         "screenshot_path": "...",
         "viewport": { "width": ..., "height": ... },
         "grid": { "rows": coarse_grid_rows, "cols": coarse_grid_cols },
-        "numbered_grid": { "cell_size_pixels": GRID_SIZE }
+        "numbered_grid": { "cell_size_pixels": GRID_SIZE },
+        "cached": false
       }
     }
     """
-    path, w, h, b64 = _take_grid_screenshot_for_ai()
-    img_url = f"data:image/png;base64,{b64}"
+    global _last_describe, _screen_dirty
+
+    frame, dhash = await asyncio.to_thread(_grab_and_hash)
 
     task_text = task_hint or "No specific task provided; describe the screen in a useful way."
+    query = (task_text, coarse_grid_rows, coarse_grid_cols, frame.shape[:2])
+    if (
+        not _screen_dirty
+        and _last_describe is not None
+        and _last_describe[0] == dhash
+        and _last_describe[1] == query
+    ):
+        parsed = copy.deepcopy(_last_describe[2])
+        parsed["_meta"]["cached"] = True
+        return parsed
+
+    path, w, h, disk_data, frame, b64, mime = await asyncio.to_thread(_take_grid_screenshot_for_ai, frame)
+    _io_pool.submit(_write_screen, path, frame, disk_data)
+    img_url = f"data:{mime};base64,{b64}"
 
     system_msg = (
         "You are ScreenSummarizer, a helper for another agent that will control the computer.\n"
@@ -394,7 +720,7 @@ def capture_and_describe_screen(task_hint: str | None = None,
     ]
 
     try:
-        mini_completion = client.chat.completions.create(
+        mini_completion = await client.chat.completions.create(
             model="gpt-4.1-mini",
             messages=[
                 {"role": "system", "content": system_msg},
@@ -418,8 +744,13 @@ def capture_and_describe_screen(task_hint: str | None = None,
         "viewport": {"width": w, "height": h},
         "grid": {"rows": coarse_grid_rows, "cols": coarse_grid_cols},
         "numbered_grid": {"cell_size_pixels": GRID_SIZE},
+        "cached": False,
     }
 
+    if "error" not in parsed:
+        _last_describe = (dhash, query, copy.deepcopy(parsed))
+        _screen_dirty = False
+
     return parsed
 
 
@@ -430,7 +761,7 @@ def raw_screenshot():
     img = Screenshot()
     ts = int(time.time())
     filename = f"screen_raw_{ts}.png"
-    img.save(filename, "PNG")
+    _io_pool.submit(img.save, filename, "PNG")
     w, h = img.size
     return {
         "status": "ok",
@@ -444,30 +775,37 @@ def raw_screenshot():
 # Tool registry (wrapping your functions)
 # =====================
 
+@_changes_screen
 def tool_click_position(x: int, y: int):
     return ClickPosition(x, y)
 
 
+@_changes_screen
 def tool_click_numbered_cell(index: int):
     return ClickGrid(index)
 
 
+@_changes_screen
 def tool_move_mouse(x: int, y: int):
     return MoveTo(x, y)
 
 
+@_changes_screen
 def tool_click_current():
     return Click()
 
 
+@_changes_screen
 def tool_send_keys(text: str, interval: float = 0.02):
     return SendKeys(text, interval=interval)
 
 
+@_changes_screen
 def tool_press_key(key: str):
     return PressKey(key)
 
 
+@_changes_screen
 def tool_hotkey(keys: list[str]):
     return Hotkey(keys)
 
@@ -746,7 +1084,7 @@ INTERACTION STYLE
 # Single-task agent loop
 # =====================
 
-def run_single_task(user_task: str):
+async def run_single_task(user_task: str):
     """
     Runs the screen agent for ONE task.
     Returns when the model decides it is finished for this task.
@@ -757,7 +1095,7 @@ def run_single_task(user_task: str):
     ]
 
     while True:
-        completion = client.chat.completions.create(
+        completion = await client.chat.completions.create(
             model="gpt-5.1",
             messages=messages,
             tools=tools,
@@ -784,6 +1122,8 @@ def run_single_task(user_task: str):
                 else:
                     try:
                         tool_result = tool_fn(**args)
+                        if inspect.isawaitable(tool_result):
+                            tool_result = await tool_result
                     except Exception as e:
                         tool_result = {"error": str(e)}
 
@@ -809,21 +1149,22 @@ def run_single_task(user_task: str):
 # Main loop
 # =====================
 
-def main():
+async def main():
     print("ScreenPilot v3 (vision + pyautogui + numbered grid). Move mouse to TOP-LEFT corner to trigger pyautogui failsafe.\n")
     try:
         while True:
-            user_task = input("Enter your screen task (or type 'exit' to quit): ").strip()
+            # one event loop for the whole session so the async client's connections are reused
+            user_task = (await asyncio.to_thread(input, "Enter your screen task (or type 'exit' to quit): ")).strip()
             if user_task.lower() == "exit":
                 print("Exiting ScreenPilot v3...")
                 break
             if not user_task:
                 continue
-            run_single_task(user_task)
+            await run_single_task(user_task)
     finally:
         # Nothing special to clean up here, but kept for symmetry
         pass
 
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
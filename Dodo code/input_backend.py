@@ -0,0 +1,195 @@
+# input_backend.py
+# Direct mouse/keyboard input for the screen agents.
+# On Windows this goes straight to user32 SendInput (no pyautogui per-call
+# PAUSE, no coordinate helpers); anywhere else it falls back to pyautogui.
+
+import sys
+import time
+import ctypes
+
+import pyautogui
+
+USE_SENDINPUT = sys.platform == "win32"
+
+# =====================
+# Win32 structs
+# =====================
+
+INPUT_MOUSE = 0
+INPUT_KEYBOARD = 1
+
+MOUSEEVENTF_LEFTDOWN = 0x0002
+MOUSEEVENTF_LEFTUP = 0x0004
+MOUSEEVENTF_RIGHTDOWN = 0x0008
+MOUSEEVENTF_RIGHTUP = 0x0010
+MOUSEEVENTF_MIDDLEDOWN = 0x0020
+MOUSEEVENTF_MIDDLEUP = 0x0040
+
+KEYEVENTF_EXTENDEDKEY = 0x0001
+KEYEVENTF_KEYUP = 0x0002
+KEYEVENTF_UNICODE = 0x0004
+
+_BUTTON_FLAGS = {
+    "left": (MOUSEEVENTF_LEFTDOWN, MOUSEEVENTF_LEFTUP),
+    "right": (MOUSEEVENTF_RIGHTDOWN, MOUSEEVENTF_RIGHTUP),
+    "middle": (MOUSEEVENTF_MIDDLEDOWN, MOUSEEVENTF_MIDDLEUP),
+}
+
+_ULONG_PTR = ctypes.c_size_t
+
+
+class MOUSEINPUT(ctypes.Structure):
+    _fields_ = [
+        ("dx", ctypes.c_long),
+        ("dy", ctypes.c_long),
+        ("mouseData", ctypes.c_ulong),
+        ("dwFlags", ctypes.c_ulong),
+        ("time", ctypes.c_ulong),
+        ("dwExtraInfo", _ULONG_PTR),
+    ]
+
+
+class KEYBDINPUT(ctypes.Structure):
+    _fields_ = [
+        ("wVk", ctypes.c_ushort),
+        ("wScan", ctypes.c_ushort),
+        ("dwFlags", ctypes.c_ulong),
+        ("time", ctypes.c_ulong),
+        ("dwExtraInfo", _ULONG_PTR),
+    ]
+
+
+class HARDWAREINPUT(ctypes.Structure):
+    _fields_ = [
+        ("uMsg", ctypes.c_ulong),
+        ("wParamL", ctypes.c_ushort),
+        ("wParamH", ctypes.c_ushort),
+    ]
+
+
+class _INPUTUNION(ctypes.Union):
+    _fields_ = [("mi", MOUSEINPUT), ("ki", KEYBDINPUT), ("hi", HARDWAREINPUT)]
+
+
+class INPUT(ctypes.Structure):
+    _anonymous_ = ("u",)
+    _fields_ = [("type", ctypes.c_ulong), ("u", _INPUTUNION)]
+
+
+# Virtual-key codes for the key names the agent uses (pyautogui's names)
+_VK = {
+    "backspace": 0x08, "tab": 0x09, "enter": 0x0D, "return": 0x0D,
+    "shift": 0x10, "ctrl": 0x11, "control": 0x11, "alt": 0x12,
+    "pause": 0x13, "capslock": 0x14, "esc": 0x1B, "escape": 0x1B,
+    "space": 0x20, "pageup": 0x21, "pgup": 0x21, "pagedown": 0x22,
+    "pgdn": 0x22, "end": 0x23, "home": 0x24, "left": 0x25, "up": 0x26,
+    "right": 0x27, "down": 0x28, "printscreen": 0x2C, "insert": 0x2D,
+    "delete": 0x2E, "del": 0x2E, "win": 0x5B, "winleft": 0x5B,
+    "winright": 0x5C, "apps": 0x5D, "shiftleft": 0xA0, "shiftright": 0xA1,
+    "ctrlleft": 0xA2, "ctrlright": 0xA3, "altleft": 0xA4, "altright": 0xA5,
+}
+_VK.update({f"f{i}": 0x6F + i for i in range(1, 25)})
+_VK.update({c: ord(c.upper()) for c in "abcdefghijklmnopqrstuvwxyz0123456789"})
+
+# These need KEYEVENTF_EXTENDEDKEY or Windows treats them as numpad keys
+_EXTENDED_VK = {0x21, 0x22, 0x23, 0x24, 0x25, 0x26, 0x27, 0x28, 0x2D, 0x2E,
+                0x5B, 0x5C, 0x5D, 0xA3, 0xA5}
+
+if USE_SENDINPUT:
+    _user32 = ctypes.windll.user32
+    _user32.SendInput.argtypes = (ctypes.c_uint, ctypes.POINTER(INPUT), ctypes.c_int)
+
+
+def _send(*inputs):
+    arr = (INPUT * len(inputs))(*inputs)
+    _user32.SendInput(len(inputs), arr, ctypes.sizeof(INPUT))
+
+
+def _mouse(flags):
+    return INPUT(type=INPUT_MOUSE, mi=MOUSEINPUT(dwFlags=flags))
+
+
+def _vk(vk, up=False):
+    flags = KEYEVENTF_KEYUP if up else 0
+    if vk in _EXTENDED_VK:
+        flags |= KEYEVENTF_EXTENDEDKEY
+    return INPUT(type=INPUT_KEYBOARD, ki=KEYBDINPUT(wVk=vk, dwFlags=flags))
+
+
+def _unicode(unit, up=False):
+    flags = KEYEVENTF_UNICODE | (KEYEVENTF_KEYUP if up else 0)
+    return INPUT(type=INPUT_KEYBOARD, ki=KEYBDINPUT(wScan=unit, dwFlags=flags))
+
+
+def _char_events(ch):
+    # Enter/Tab as real keys so text fields submit/advance like typing would
+    if ch == "\n":
+        return [_vk(0x0D), _vk(0x0D, up=True)]
+    if ch == "\t":
+        return [_vk(0x09), _vk(0x09, up=True)]
+    # one down/up pair per UTF-16 unit (emoji etc. are surrogate pairs)
+    data = ch.encode("utf-16-le")
+    units = [int.from_bytes(data[i:i + 2], "little") for i in range(0, len(data), 2)]
+    return [e for u in units for e in (_unicode(u), _unicode(u, up=True))]
+
+# =====================
+# Public API (same arguments as the pyautogui calls they replace)
+# =====================
+
+def move(x: int, y: int):
+    pyautogui.failSafeCheck()
+    if USE_SENDINPUT:
+        _user32.SetCursorPos(int(x), int(y))
+    else:
+        pyautogui.moveTo(x, y, _pause=False)
+
+
+def click(x: int | None = None, y: int | None = None, button: str = "left",
+          clicks: int = 1, interval: float = 0.0):
+    if not USE_SENDINPUT:
+        pyautogui.click(x=x, y=y, clicks=clicks, interval=interval, button=button, _pause=False)
+        return
+    if x is not None and y is not None:
+        move(x, y)
+    pyautogui.failSafeCheck()
+    down, up = _BUTTON_FLAGS[button]
+    for i in range(clicks):
+        if i and interval:
+            time.sleep(interval)
+        _send(_mouse(down), _mouse(up))
+
+
+def type_text(text: str, interval: float = 0.0):
+    """
+    Type text as Unicode key events. With no interval the whole string
+    goes out in a single SendInput call.
+    """
+    pyautogui.failSafeCheck()
+    if not USE_SENDINPUT:
+        pyautogui.write(text, interval=interval, _pause=False)
+        return
+    if not interval:
+        events = [e for ch in text for e in _char_events(ch)]
+        if events:
+            _send(*events)
+        return
+    for ch in text:
+        _send(*_char_events(ch))
+        time.sleep(interval)
+
+
+def hotkey(*keys: str):
+    """
+    Press keys in order, release in reverse (also used for single keys).
+    Names the table doesn't know go through pyautogui.
+    """
+    pyautogui.failSafeCheck()
+    vks = [_VK.get(k.lower()) for k in keys]
+    if not USE_SENDINPUT or None in vks:
+        pyautogui.hotkey(*keys)
+        return
+    _send(*[_vk(vk) for vk in vks], *[_vk(vk, up=True) for vk in reversed(vks)])
+
+
+def press(key: str):
+    hotkey(key)
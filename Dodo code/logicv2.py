@@ -3,15 +3,34 @@
 
 import os
 import json
+import base64
 import random
+import asyncio
+import hashlib
+import functools
+import contextlib
 from datetime import datetime
-
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+from openai import (
+    AsyncOpenAI,
+    APIConnectionError,
+    APITimeoutError,
+    InternalServerError,
+    RateLimitError,
+)
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait, Select
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException
+
+try:
+    import h2  # noqa: F401  (httpx's HTTP/2 support, `pip install httpx[http2]`)
+    HTTP2 = True
+except ImportError:
+    HTTP2 = False
 
 # =====================
 # OpenAI + Selenium setup
@@ -21,30 +40,107 @@ api_key = os.getenv("OPENAI_API_KEY")
 if not api_key:
     raise RuntimeError("Please set the OPENAI_API_KEY environment variable (your OpenAI API key).")
 
-client = OpenAI(api_key=api_key)
-
-# Launch Chrome (adjust options as you like)
-driver = webdriver.Chrome()
+# One pooled, keep-alive connection set for the whole session (HTTP/2 when
+# h2 is installed), so turns after the first skip the TCP/TLS handshake.
+http_client = httpx.AsyncClient(
+    http2=HTTP2,
+    timeout=60,
+    limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+)
+# Retries are handled by _stream_turn, so the SDK's own are off
+client = AsyncOpenAI(api_key=api_key, http_client=http_client, max_retries=0)
+
+# Transient API failures are retried with exponential backoff instead of
+# killing the task. A dropped stream can surface as a raw httpx error.
+API_RETRIES = 5
+RETRYABLE_ERRORS = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError,
+                    httpx.TransportError)
+
+# Requests share a fixed prefix (tools + SYSTEM_PROMPT, well over 1024 tokens),
+# so OpenAI's automatic prompt caching can reuse it; the key keeps every
+# turn of every task in the same cache bucket.
+PROMPT_CACHE_KEY = "webagent-v1"
+
+# Launch Chrome (adjust options as you like).
+# A persistent profile keeps the HTTP/disk cache warm between runs, and
+# "eager" returns from driver.get() at DOMContentLoaded instead of waiting
+# on every image/font (wait_for_element covers late content).
+CHROME_PROFILE_DIR = os.getenv(
+    "WEBAGENT_PROFILE_DIR", os.path.expanduser("~/.webagent-profile")
+)
+options = webdriver.ChromeOptions()
+options.add_argument(f"--user-data-dir={CHROME_PROFILE_DIR}")
+options.add_argument("--disk-cache-size=268435456")
+options.add_argument("--disable-background-networking")
+options.add_argument("--disable-sync")
+options.page_load_strategy = "eager"
+driver = webdriver.Chrome(options=options)
+# No implicit wait by default; explicit waits poll at WAIT_POLL_SECS and
+# click/type use a short implicit wait (polled inside the browser) instead
+driver.implicitly_wait(0)
+WAIT_POLL_SECS = 0.1
+FIND_WAIT_SECS = 2
+
+# Background disk writes (screenshots), so the agent loop never waits on a flush
+_io_pool = ThreadPoolExecutor(max_workers=2)
 
 # =====================
 # Selenium-backed tools
 # =====================
 
+_BY_MAP = {
+    "css": By.CSS_SELECTOR,
+    "css_selector": By.CSS_SELECTOR,
+    "css selector": By.CSS_SELECTOR,
+    "xpath": By.XPATH,
+    "id": By.ID,
+    "name": By.NAME,
+    "link_text": By.LINK_TEXT,
+    "link text": By.LINK_TEXT,
+}
+
+
 def _get_by(by: str):
-    by = by.lower()
-    if by in ["css", "css_selector", "css selector"]:
-        return By.CSS_SELECTOR
-    if by == "xpath":
-        return By.XPATH
-    if by == "id":
-        return By.ID
-    if by == "name":
-        return By.NAME
-    if by in ["link_text", "link text"]:
-        return By.LINK_TEXT
-    raise ValueError(f"Unsupported locator type: {by}")
+    try:
+        return _BY_MAP[by.lower()]
+    except KeyError:
+        raise ValueError(f"Unsupported locator type: {by}") from None
+
 
+@contextlib.contextmanager
+def _implicit_wait(seconds: float = FIND_WAIT_SECS):
+    """
+    Temporarily let find_element wait for the element to appear,
+    so the agent doesn't need a wait_for_element call first.
+    """
+    driver.implicitly_wait(seconds)
+    try:
+        yield
+    finally:
+        driver.implicitly_wait(0)
 
+
+# Set by any tool that can change the page; summarize_page_for_agent only
+# trusts its cache while this is False.
+_page_dirty = True
+
+
+def _mutates_page(fn):
+    """
+    Mark the page dirty after fn runs, whether or not it succeeded
+    (a failed click can still have changed the DOM).
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        global _page_dirty
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _page_dirty = True
+    return wrapper
+
+
+@_mutates_page
 def goto_url(url: str):
     driver.get(url)
     return {"status": "navigated", "url": url}
@@ -53,7 +149,18 @@ def goto_url(url: str):
 def wait_for_element(by: str, selector: str, timeout: int = 10):
     by_type = _get_by(by)
     try:
-        WebDriverWait(driver, timeout).until(
+        # Fast path: already on the page, no wait object needed
+        driver.find_element(by_type, selector)
+        return {
+            "status": "found",
+            "by": by,
+            "selector": selector,
+            "timeout": timeout,
+        }
+    except NoSuchElementException:
+        pass
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=WAIT_POLL_SECS).until(
             EC.presence_of_element_located((by_type, selector))
         )
         return {
@@ -71,14 +178,40 @@ def wait_for_element(by: str, selector: str, timeout: int = 10):
         }
 
 
+# One round-trip click for locators the page can resolve itself
+_FAST_CLICK_BY = {By.CSS_SELECTOR: "css", By.ID: "id", By.NAME: "name"}
+_FAST_CLICK_JS = """
+    const [by, sel] = arguments;
+    const el = by === 'id' ? document.getElementById(sel)
+        : by === 'name' ? document.getElementsByName(sel)[0]
+        : document.querySelector(sel);
+    if (!el) return 'not_found';
+    if (el.disabled || el.hasAttribute('disabled')) return 'disabled';
+    el.click();
+    return 'clicked';
+"""
+
+
+@_mutates_page
 def click_element(by: str, selector: str):
     """
     Click an element safely:
+    - css/id/name: find, disabled check and click in one script call.
     - If disabled, return 'disabled' instead of throwing.
-    - Try normal click first, then fallback JS click.
+    - Otherwise (or if the script can't find it yet) try normal click
+      first, then fallback JS click.
     """
     by_type = _get_by(by)
-    element = driver.find_element(by_type, selector)
+    if by_type in _FAST_CLICK_BY:
+        try:
+            status = driver.execute_script(_FAST_CLICK_JS, _FAST_CLICK_BY[by_type], selector)
+        except Exception:
+            status = None  # e.g. invalid selector; let the WebDriver path report it
+        if status in ("clicked", "disabled"):
+            return {"status": status, "by": by, "selector": selector, "via": "script"}
+
+    with _implicit_wait():
+        element = driver.find_element(by_type, selector)
 
     disabled_attr = element.get_attribute("disabled")
     if (disabled_attr is not None) or (not element.is_enabled()):
@@ -112,9 +245,11 @@ def click_element(by: str, selector: str):
             }
 
 
+@_mutates_page
 def type_text(by: str, selector: str, text: str, submit: bool = False):
     by_type = _get_by(by)
-    element = driver.find_element(by_type, selector)
+    with _implicit_wait():
+        element = driver.find_element(by_type, selector)
     element.clear()
     element.send_keys(text)
     if submit:
@@ -140,60 +275,122 @@ def get_text(by: str, selector: str):
     }
 
 
+@_mutates_page
 def scroll_by(x: int = 0, y: int = 500):
     driver.execute_script("window.scrollBy(arguments[0], arguments[1]);", x, y)
     return {"status": "scrolled", "x": x, "y": y}
 
 
+# sha1 of the HTML get_page_html last returned
+_last_html_hash = None
+
+
 def get_page_html():
     """
     Return the current page HTML (trimmed).
     The main agent should usually prefer summarize_page_for_agent(),
     but this stays as a debug / backup tool.
+    Returns status "unchanged" (no HTML) if nothing changed since the last call.
     """
+    global _last_html_hash
     html = driver.page_source
+    html_hash = hashlib.sha1(html.encode("utf-8", "replace")).hexdigest()
+    if html_hash == _last_html_hash:
+        # The model already has this HTML from its last call; don't resend it
+        return {"status": "unchanged", "hash": html_hash, "length": len(html)}
+    _last_html_hash = html_hash
+
     max_len = 20000
     trimmed = html[:max_len]
     return {
         "status": "ok",
         "length": len(html),
         "returned_length": len(trimmed),
+        "hash": html_hash,
         "html": trimmed,
     }
 
 
+def _write_file(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+SCREENSHOT_JPEG_QUALITY = 80
+
+
+def _write_b64_file(path, b64_data):
+    _write_file(path, base64.b64decode(b64_data))
+
+
 def screenshot_page():
     """
     Take a screenshot of the current page for YOU to inspect manually.
     The agent only sees the file path.
     """
     ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"screenshot_{ts}.png"
-    driver.save_screenshot(filename)
+    filename = f"screenshot_{ts}.jpg"
+    # CDP straight to the existing session: Chrome encodes a JPEG instead of
+    # deflating a full PNG. Grab the data now; decoding and the write happen
+    # while the next model call is in flight.
+    res = driver.execute_cdp_cmd(
+        "Page.captureScreenshot",
+        {"format": "jpeg", "quality": SCREENSHOT_JPEG_QUALITY, "captureBeyondViewport": False},
+    )
+    _io_pool.submit(_write_b64_file, filename, res["data"])
     return {
         "status": "saved",
         "file": filename,
     }
 
 
+# JS expressions for the list_* tools
+_FORM_ELEMENTS_JS = """
+    Array.from(document.querySelectorAll('input, select, button')).map(e => ({
+        tag: e.tagName,
+        name: e.name || null,
+        id: e.id || null,
+        type: e.type || null,
+        text: e.innerText || null,
+        placeholder: e.placeholder || null,
+        classes: e.className || null
+    }))
+"""
+
+_CLICKABLE_ELEMENTS_JS = """
+    Array.from(
+        document.querySelectorAll('a, button, div[role="button"]')
+    ).map(e => ({
+        tag: e.tagName,
+        text: e.innerText || null,
+        classes: e.className || null,
+        aria_label: e.getAttribute('aria-label')
+    }))
+"""
+
+
+# Cheap stand-in for a full snapshot: URL, load state, interactive-element
+# count and a hash of a tag/aria-label sample. The sample is hashed
+# in the page (32-bit FNV-1a) so only a few short values come back.
+_PAGE_FINGERPRINT_JS = """
+    const els = document.querySelectorAll('a, button, input, select, textarea, div[role="button"]');
+    const sample = Array.from(els).slice(0, 200)
+        .map(e => e.tagName + ':' + (e.getAttribute('aria-label') || ''))
+        .join('|');
+    let h = 0x811c9dc5;
+    for (let i = 0; i < sample.length; i++) {
+        h = Math.imul(h ^ sample.charCodeAt(i), 0x01000193);
+    }
+    return [location.href, document.readyState, els.length, (h >>> 0).toString(16)];
+"""
+
+
 def list_form_elements():
     """
     Use JavaScript to list input/select/button elements and their attributes.
     Helps the AI pick correct selectors instead of guessing.
     """
-    elements = driver.execute_script(
-        """
-        return Array.from(document.querySelectorAll('input, select, button')).map(e => ({
-            tag: e.tagName,
-            name: e.name || null,
-            id: e.id || null,
-            type: e.type || null,
-            text: e.innerText || null,
-            placeholder: e.placeholder || null,
-            classes: e.className || null
-        }));
-        """
-    )
+    elements = driver.execute_script("return " + _FORM_ELEMENTS_JS)
     return {
         "status": "ok",
         "count": len(elements),
@@ -206,18 +403,7 @@ def list_clickable_elements():
     List clickable elements (links, buttons, div[role=button]) with visible text.
     Very useful on dynamic apps.
     """
-    elements = driver.execute_script(
-        """
-        return Array.from(
-            document.querySelectorAll('a, button, div[role="button"]')
-        ).map(e => ({
-            tag: e.tagName,
-            text: e.innerText || null,
-            classes: e.className || null,
-            aria_label: e.getAttribute('aria-label')
-        }));
-        """
-    )
+    elements = driver.execute_script("return " + _CLICKABLE_ELEMENTS_JS)
     return {
         "status": "ok",
         "count": len(elements),
@@ -225,6 +411,7 @@ def list_clickable_elements():
     }
 
 
+@_mutates_page
 def select_option(
     by: str,
     selector: str,
@@ -283,30 +470,147 @@ def select_option(
     }
 
 
+@_mutates_page
+def fill_form(fields: list[dict]):
+    """
+    Type into several fields in one tool call.
+    Each field is {by, selector, text, submit?}; stops at the first failure.
+    """
+    for i, f in enumerate(fields):
+        try:
+            by_type = _get_by(f["by"])
+            with _implicit_wait():
+                element = driver.find_element(by_type, f["selector"])
+            element.clear()
+            element.send_keys(f["text"])
+            if f.get("submit"):
+                element.submit()
+        except Exception as e:
+            return {
+                "status": "error",
+                "filled": i,
+                "failed_selector": f.get("selector"),
+                "error": str(e),
+            }
+    return {"status": "ok", "count": len(fields)}
+
+
+def click_sequence(selectors: list[dict]):
+    """
+    Click several elements in order in one tool call.
+    Each entry is {by, selector}; stops at the first click that doesn't land.
+    """
+    results = []
+    for s in selectors:
+        try:
+            result = click_element(s["by"], s["selector"])
+        except Exception as e:
+            result = {"status": "error", "selector": s.get("selector"), "error": str(e)}
+        results.append(result)
+        if result["status"] not in ("clicked", "clicked_js"):
+            return {"status": "stopped", "clicked": len(results) - 1, "results": results}
+    return {"status": "ok", "clicked": len(results), "results": results}
+
+
 # =====================
 # DOM summarizer sub-agent (NO extra LLM)
 # =====================
 
-def _simple_css_for_element(tag, el):
+# The whole summary is built in the browser (slicing and selector guesses
+# included) so only the final ~25-per-list result crosses the WebDriver wire.
+# Selector guess: id, then tag[name], then tag.first-class.
+_PAGE_SUMMARY_JS = """
+    const cssFor = (tag, id, name, classes) => {
+        if (id) return '#' + id;
+        tag = (tag || '').toLowerCase();
+        if (name && tag) return tag + '[name="' + name + '"]';
+        if (typeof classes === 'string') {
+            const first = classes.trim().split(/\\s+/)[0];
+            if (first) return tag + '.' + first;
+        }
+        return null;
+    };
+    const texts = sel => Array.from(document.querySelectorAll(sel))
+        .map(e => e.innerText)
+        .filter(t => t && t.trim());
+
+    const title = document.title || '';
+    const headings = texts('h1, h2, h3').slice(0, 8);
+    const paragraphs = texts('p').slice(0, 5);
+    const important_text = [...new Set(
+        [title, ...headings, ...paragraphs].map(t => t.trim()).filter(Boolean)
+    )];
+
+    const inputs = Array.from(document.querySelectorAll('input, select, button'))
+        .slice(0, 25)
+        .map(e => ({
+            label: e.innerText || null,
+            placeholder: e.placeholder || null,
+            id: e.id || null,
+            name: e.name || null,
+            type: e.type || null,
+            css: cssFor(e.tagName, e.id, e.name, e.className)
+        }));
+
+    const buttons = [];
+    const links = [];
+    for (const e of Array.from(
+        document.querySelectorAll('a, button, div[role="button"]')
+    ).slice(0, 80)) {
+        const tag = e.tagName.toLowerCase();
+        const text = (e.innerText || '').trim() || null;
+        const aria = e.getAttribute('aria-label');
+        const css = cssFor(tag, null, null, e.className);
+        if (tag === 'button' || (tag === 'div' && aria)) {
+            if (buttons.length < 25) buttons.push({text: text, aria_label: aria, css: css});
+        } else if (tag === 'a') {
+            if (links.length < 25) links.push({text: text, css: css});
+        }
+    }
+
+    return {
+        page_purpose: title || headings[0] || null,
+        important_text: important_text,
+        inputs: inputs,
+        buttons: buttons,
+        links: links
+    };
+"""
+
+
+def _cdp_eval(script: str):
     """
-    Helper to make a simple CSS selector from an element descriptor.
-    Prefers id, then name, then first class.
+    Run a function-body script (one that uses `return`) through CDP
+    Runtime.evaluate and return its value. Skips WebDriver's script
+    wrapper and element-reference marshalling on the summarizer path.
     """
-    tag = (tag or "").lower() if tag else ""
-    el_id = el.get("id")
-    name = el.get("name")
-    classes = el.get("classes")
+    res = driver.execute_cdp_cmd(
+        "Runtime.evaluate",
+        {
+            "expression": f"(() => {{{script}}})()",
+            "returnByValue": True,
+            "awaitPromise": False,
+        },
+    )
+    if "exceptionDetails" in res:
+        raise RuntimeError(res["exceptionDetails"].get("text", "script error"))
+    return res["result"].get("value")
+
 
-    if el_id:
-        return f"#{el_id}"
-    if name and tag:
-        # guess by tag+name
-        return f"{tag.lower()}[name=\"{name}\"]"
-    if classes:
-        first_class = classes.split()[0]
-        if first_class:
-            return f"{tag.lower()}.{first_class}"
-    return None
+# url -> (fingerprint, summarize_page_for_agent result)
+_summary_cache: dict[str, tuple[str, dict]] = {}
+
+
+def _page_fingerprint():
+    """
+    Return (url, fingerprint) for the current DOM, or (None, None) if the
+    page can't be read.
+    """
+    try:
+        url, ready_state, count, digest = _cdp_eval(_PAGE_FINGERPRINT_JS)
+    except Exception:
+        return None, None
+    return url, f"{ready_state}|{count}|{digest}"
 
 
 def summarize_page_for_agent():
@@ -315,119 +619,33 @@ def summarize_page_for_agent():
     - Uses DOM (title, headings, paragraphs, inputs, buttons, links).
     - Returns a compact JSON string for the main agent to reason over.
     No extra OpenAI call here.
+    Repeat calls on an unchanged page are served from _summary_cache.
     """
-    try:
-        title = driver.title or ""
-    except Exception:
-        title = ""
+    global _page_dirty
+    url, fingerprint = _page_fingerprint()
+    cached = _summary_cache.get(url)
+    if not _page_dirty and cached and cached[0] == fingerprint:
+        return cached[1]
 
-    # Grab headings and some paragraph text
     try:
-        headings = driver.execute_script(
-            """
-            return Array.from(document.querySelectorAll('h1, h2, h3'))
-                .map(e => e.innerText)
-                .filter(t => t && t.trim())
-                .slice(0, 8);
-            """
-        ) or []
+        summary_obj = _cdp_eval(_PAGE_SUMMARY_JS) or {}
     except Exception:
-        headings = []
-
-    try:
-        paragraphs = driver.execute_script(
-            """
-            return Array.from(document.querySelectorAll('p'))
-                .map(e => e.innerText)
-                .filter(t => t && t.trim())
-                .slice(0, 5);
-            """
-        ) or []
-    except Exception:
-        paragraphs = []
-
-    important_text = []
-    seen = set()
-    for t in [title] + headings + paragraphs:
-        if not t:
-            continue
-        t = t.strip()
-        if t and t not in seen:
-            important_text.append(t)
-            seen.add(t)
-
-    # Use existing helpers to list form and clickable elements
-    form_info = list_form_elements()
-    click_info = list_clickable_elements()
-
-    inputs = []
-    buttons = []
-    links = []
-
-    # Inputs: from form elements that look like inputs/selects
-    for el in form_info.get("elements", [])[:40]:
-        tag = (el.get("tag") or "").lower()
-        if tag in ("input", "select", "textarea", "button"):
-            css = _simple_css_for_element(tag, el)
-            inputs.append(
-                {
-                    "label": el.get("text"),
-                    "placeholder": el.get("placeholder"),
-                    "id": el.get("id"),
-                    "name": el.get("name"),
-                    "type": el.get("type"),
-                    "css": css,
-                }
-            )
-
-    # Buttons & links from clickables
-    for el in click_info.get("elements", [])[:80]:
-        tag = (el.get("tag") or "").lower()
-        text = (el.get("text") or "").strip()
-        aria = el.get("aria_label")
-        css = None
-
-        # Build pseudo element descriptor for CSS helper
-        pseudo_el = {
-            "id": None,
-            "name": None,
-            "classes": el.get("classes"),
+        summary_obj = {
+            "page_purpose": None,
+            "important_text": [],
+            "inputs": [],
+            "buttons": [],
+            "links": [],
         }
-        css = _simple_css_for_element(tag, pseudo_el)
-
-        if tag == "button" or (tag == "div" and aria):
-            buttons.append(
-                {
-                    "text": text or None,
-                    "aria_label": aria,
-                    "css": css,
-                }
-            )
-        elif tag == "a":
-            links.append(
-                {
-                    "text": text or None,
-                    "css": css,
-                }
-            )
 
-    # Trim lists to keep it small
-    inputs = inputs[:25]
-    buttons = buttons[:25]
-    links = links[:25]
-
-    summary_obj = {
-        "page_purpose": title or (headings[0] if headings else None),
-        "important_text": important_text,
-        "inputs": inputs,
-        "buttons": buttons,
-        "links": links,
-    }
-
-    return {
+    result = {
         "status": "ok",
         "summary": json.dumps(summary_obj, ensure_ascii=False),
     }
+    if fingerprint is not None:
+        _summary_cache[url] = (fingerprint, result)
+        _page_dirty = False
+    return result
 
 
 # Map tool names to Python functions
@@ -443,9 +661,22 @@ TOOL_IMPLS = {
     "list_form_elements": list_form_elements,
     "list_clickable_elements": list_clickable_elements,
     "select_option": select_option,
+    "fill_form": fill_form,
+    "click_sequence": click_sequence,
     "summarize_page_for_agent": summarize_page_for_agent,
 }
 
+# Tools that only read the page; consecutive calls to these can run concurrently
+READ_ONLY_TOOLS = {
+    "wait_for_element",
+    "get_text",
+    "get_page_html",
+    "screenshot_page",
+    "list_form_elements",
+    "list_clickable_elements",
+    "summarize_page_for_agent",
+}
+
 # =====================
 # Tool definitions (exposed to GPT)
 # =====================
@@ -603,7 +834,10 @@ tools = [
         "type": "function",
         "function": {
             "name": "get_page_html",
-            "description": "Get the current page HTML (trimmed). Prefer summarize_page_for_agent() first.",
+            "description": (
+                "Get the current page HTML (trimmed). Prefer summarize_page_for_agent() first. "
+                "Returns status 'unchanged' without HTML if the page is the same as your last call."
+            ),
             "parameters": {
                 "type": "object",
                 "properties": {},
@@ -616,7 +850,7 @@ tools = [
         "type": "function",
         "function": {
             "name": "screenshot_page",
-            "description": "Take a screenshot of the current page and save it as a PNG file.",
+            "description": "Take a screenshot of the current page and save it as a JPEG file.",
             "parameters": {
                 "type": "object",
                 "properties": {},
@@ -691,6 +925,87 @@ tools = [
             },
         },
     },
+    {
+        "type": "function",
+        "function": {
+            "name": "fill_form",
+            "description": (
+                "Fill several inputs in one call (clear + type each, in order). "
+                "Stops at the first field that fails and reports how many were filled."
+            ),
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "fields": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "by": {
+                                    "type": "string",
+                                    "description": "Locator strategy: css, xpath, id, name, or link_text.",
+                                    "enum": ["css", "xpath", "id", "name", "link_text"],
+                                },
+                                "selector": {
+                                    "type": "string",
+                                    "description": "The selector used with the chosen locator strategy.",
+                                },
+                                "text": {
+                                    "type": "string",
+                                    "description": "The text to type into the element.",
+                                },
+                                "submit": {
+                                    "type": "boolean",
+                                    "description": "If true, submit the form after typing this field.",
+                                    "default": False,
+                                },
+                            },
+                            "required": ["by", "selector", "text"],
+                            "additionalProperties": False,
+                        },
+                    },
+                },
+                "required": ["fields"],
+                "additionalProperties": False,
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "click_sequence",
+            "description": (
+                "Click several elements in order in one call. "
+                "Stops at the first click that fails and returns each click's result."
+            ),
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "selectors": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "by": {
+                                    "type": "string",
+                                    "description": "Locator strategy: css, xpath, id, name, or link_text.",
+                                    "enum": ["css", "xpath", "id", "name", "link_text"],
+                                },
+                                "selector": {
+                                    "type": "string",
+                                    "description": "The selector used with the chosen locator strategy.",
+                                },
+                            },
+                            "required": ["by", "selector"],
+                            "additionalProperties": False,
+                        },
+                    },
+                },
+                "required": ["selectors"],
+                "additionalProperties": False,
+            },
+        },
+    },
     {
         "type": "function",
         "function": {
@@ -760,6 +1075,10 @@ SELECTORS & ACTIONS
   - IDs: "#some-id"
   - Data attributes or clear aria-labels: "button[aria-label='Create new Kahoot.']"
   - Simple classes if needed: ".btn-primary"
+- Batch actions you already have selectors for:
+  - fill_form(fields=[...]) instead of several type_text() calls.
+  - click_sequence(selectors=[...]) for clicks that don't need a look at the page in between.
+  - click_element/type_text/fill_form wait briefly for their element, so no wait_for_element() is needed first.
 - If a click or wait times out:
   - Try summarize_page_for_agent() or list_clickable_elements() to find better selectors.
   - Do NOT give up after a single failure.
@@ -788,62 +1107,207 @@ GENERAL MINDSET
 # Single-task agent loop
 # =====================
 
-def run_single_task(user_task: str):
+async def run_tool(tool_call):
+    """
+    Execute one tool call in a worker thread (Selenium is sync) and return
+    the tool message to append to the conversation.
+    """
+    func_name = tool_call["function"]["name"]
+    raw_args = tool_call["function"]["arguments"] or "{}"
+    try:
+        args = json.loads(raw_args)
+    except json.JSONDecodeError:
+        args = {}
+
+    print(f"[Agent] Calling tool {func_name} with args {args}")
+    tool_fn = TOOL_IMPLS.get(func_name)
+    if not tool_fn:
+        tool_result = {"error": f"Tool {func_name} not implemented."}
+    else:
+        try:
+            tool_result = await asyncio.to_thread(tool_fn, **args)
+        except Exception as e:
+            tool_result = {"error": str(e)}
+
+    print(f"[Tool Result] {tool_result}")
+    return {
+        "role": "tool",
+        "tool_call_id": tool_call["id"],
+        "content": json.dumps(tool_result),
+    }
+
+
+async def _run_after(deps, tool_call):
+    if deps:
+        await asyncio.gather(*deps)
+    return await run_tool(tool_call)
+
+
+class ToolCallStream:
+    """
+    Rebuilds tool calls from streamed deltas and starts each one as soon as
+    its arguments are complete JSON, while the model is still generating.
+    Read-only tools overlap each other; anything that changes the page waits
+    for every call before it, so clicks/typing keep the model's ordering.
+    """
+
+    def __init__(self):
+        self.calls = {}  # index -> tool call dict, as sent back to the API
+        self.tasks = {}  # index -> asyncio.Task producing the tool message
+        self._next = 0
+        self._last_mutating = None
+        self._pending_reads = []
+
+    def feed(self, delta_tool_calls):
+        for d in delta_tool_calls:
+            call = self.calls.setdefault(
+                d.index,
+                {"id": "", "type": "function", "function": {"name": "", "arguments": ""}},
+            )
+            if d.id:
+                call["id"] = d.id
+            if d.function and d.function.name:
+                call["function"]["name"] += d.function.name
+            if d.function and d.function.arguments:
+                call["function"]["arguments"] += d.function.arguments
+        self._start_ready()
+
+    def _args_complete(self, call):
+        try:
+            json.loads(call["function"]["arguments"])
+            return True
+        except json.JSONDecodeError:
+            return False
+
+    def _start_ready(self, force=False):
+        # strictly in index order, so each call's dependencies are known
+        while self._next in self.calls:
+            call = self.calls[self._next]
+            if not force and not self._args_complete(call):
+                return
+            deps = [self._last_mutating] if self._last_mutating else []
+            if call["function"]["name"] in READ_ONLY_TOOLS:
+                task = asyncio.create_task(_run_after(deps, call))
+                self._pending_reads.append(task)
+            else:
+                task = asyncio.create_task(_run_after(deps + self._pending_reads, call))
+                self._last_mutating = task
+                self._pending_reads = []
+            self.tasks[self._next] = task
+            self._next += 1
+
+    async def results(self):
+        """
+        Start anything still waiting (e.g. no-arg calls) and return the tool
+        messages in call order.
+        """
+        self._start_ready(force=True)
+        return [await self.tasks[i] for i in sorted(self.tasks)]
+
+
+def _compact(messages, keep_recent_tools: int = 6):
+    """
+    Replace the content of all but the newest keep_recent_tools tool results
+    with a short stub, so old page dumps stop being re-sent every turn.
+    Only fires once 2 * keep_recent_tools results are unelided, so the
+    prompt prefix (and the provider's cache of it) stays stable in between.
+    """
+    global _last_html_hash
+    live = [
+        m for m in messages
+        if m.get("role") == "tool" and not m["content"].startswith('{"elided"')
+    ]
+    if len(live) < 2 * keep_recent_tools:
+        return
+
+    names = {
+        tc["id"]: tc["function"]["name"]
+        for m in messages
+        if m.get("role") == "assistant"
+        for tc in m.get("tool_calls", [])
+    }
+    for m in live[:-keep_recent_tools]:
+        name = names.get(m["tool_call_id"])
+        m["content"] = json.dumps({"elided": True, "tool": name})
+        if name == "get_page_html":
+            # the model no longer has that HTML, so don't answer "unchanged"
+            _last_html_hash = None
+
+
+async def _stream_turn(messages):
+    """
+    One model turn: stream the reply, handing tool calls to a ToolCallStream
+    as they arrive, and return (content, tool_stream).
+
+    Rate limits, timeouts, connection drops and 5xx are retried with backoff
+    (1s, 2s, 4s, ... plus jitter), whether they hit opening the stream or
+    reading it, as long as no tool call has started yet; after that a retry
+    could repeat a click, so the error is raised.
+    """
+    for attempt in range(API_RETRIES):
+        tool_stream = ToolCallStream()
+        content_parts = []
+        try:
+            stream = await client.chat.completions.create(
+                model="gpt-5.1",  # main reasoning model
+                messages=messages,
+                tools=tools,
+                tool_choice="auto",
+                stream=True,
+                extra_body={"prompt_cache_key": PROMPT_CACHE_KEY},
+            )
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                if delta.content:
+                    content_parts.append(delta.content)
+                if delta.tool_calls:
+                    tool_stream.feed(delta.tool_calls)
+            return "".join(content_parts) or None, tool_stream
+        except RETRYABLE_ERRORS as e:
+            if attempt == API_RETRIES - 1 or tool_stream.tasks:
+                raise
+            delay = 2 ** attempt + random.random()
+            print(f"[Agent] API error ({type(e).__name__}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+
+async def run_single_task(user_task: str):
     """
     Runs the browser agent for ONE task.
     Returns when the model decides it is finished for this task.
     """
+    global _last_html_hash
+    _last_html_hash = None  # a fresh conversation hasn't seen any HTML yet
+
+    # Static prefix first, never mutated; only append after it so the
+    # provider-side prompt cache keeps hitting.
     messages = [
         {"role": "system", "content": SYSTEM_PROMPT},
         {"role": "user", "content": user_task},
     ]
 
     while True:
-        completion = client.chat.completions.create(
-            model="gpt-5.1",  # main reasoning model
-            messages=messages,
-            tools=tools,
-            tool_choice="auto",
-        )
-        msg = completion.choices[0].message
+        content, tool_stream = await _stream_turn(messages)
+        tool_calls = [tool_stream.calls[i] for i in sorted(tool_stream.calls)]
+        msg = {"role": "assistant", "content": content}
+        if tool_calls:
+            msg["tool_calls"] = tool_calls
         messages.append(msg)
 
-        # If there are tool calls, execute them and loop again
-        if msg.tool_calls:
-            for tool_call in msg.tool_calls:
-                func_name = tool_call.function.name
-                raw_args = tool_call.function.arguments or "{}"
-                try:
-                    args = json.loads(raw_args)
-                except json.JSONDecodeError:
-                    args = {}
-
-                print(f"[Agent] Calling tool {func_name} with args {args}")
-                tool_fn = TOOL_IMPLS.get(func_name)
-                if not tool_fn:
-                    tool_result = {"error": f"Tool {func_name} not implemented."}
-                else:
-                    try:
-                        tool_result = tool_fn(**args)
-                    except Exception as e:
-                        tool_result = {"error": str(e)}
-
-                print(f"[Tool Result] {tool_result}")
-                messages.append(
-                    {
-                        "role": "tool",
-                        "tool_call_id": tool_call.id,
-                        "content": json.dumps(tool_result),
-                    }
-                )
+        # If there are tool calls, collect their results and loop again
+        if tool_calls:
+            messages.extend(await tool_stream.results())
+            _compact(messages, keep_recent_tools=6)
 
             # Continue loop to let the model see tool results
             continue
 
         # No tool calls -> model believes it's finished for this task.
-        if msg.content:
+        if content:
             print("\n=== Agent Final Message for this task ===")
-            print(msg.content)
+            print(content)
             print("\n[Task finished]\n")
         break
 
@@ -852,19 +1316,21 @@ def run_single_task(user_task: str):
 # Infinite loop with 'exit'
 # =====================
 
-def main():
+async def main():
     try:
         while True:
-            user_task = input("Enter your browser task (or type 'exit' to quit): ").strip()
+            # one event loop for the whole session so the async client's connections are reused
+            user_task = (await asyncio.to_thread(input, "Enter your browser task (or type 'exit' to quit): ")).strip()
             if user_task.lower() == "exit":
                 print("Exiting WebAgent...")
                 break
             if not user_task:
                 continue
-            run_single_task(user_task)
+            await run_single_task(user_task)
     finally:
         driver.quit()
+        await http_client.aclose()
 
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
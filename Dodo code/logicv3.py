@@ -1,14 +1,48 @@
 import os
+import sys
 import time
+import ctypes
+import ctypes.wintypes
 import json
+import copy
 import base64
+import functools
 from io import BytesIO
 from datetime import datetime
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 
+import cv2
+import mss
+import numpy as np
 import pyautogui
 from PIL import Image, ImageDraw, ImageFont
 
+import input_backend
+
+import httpx
 from openai import OpenAI
+from openai.types.chat import ChatCompletion
+
+try:
+    import h2  # noqa: F401  (httpx's HTTP/2 support, `pip install httpx[http2]`)
+    HTTP2 = True
+except ImportError:
+    HTTP2 = False
+
+# orjson (C JSON) for tool arguments/results and screen descriptions if it's
+# installed. Its decode error subclasses json.JSONDecodeError.
+try:
+    import orjson
+
+    def _json_loads(data):
+        return orjson.loads(data)
+
+    def _json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:
+    _json_loads = json.loads
+    _json_dumps = json.dumps
 
 # =====================
 # Basic setup
@@ -18,58 +52,135 @@ from openai import OpenAI
 pyautogui.FAILSAFE = True
 
 GRID_CELL_SIZE = 50  # pixels for the numbered grid overlay
+GRID_LABEL_EVERY = 3  # label every 3rd cell across and down; the rest are inferred
+
+
+def refresh_screen_metrics():
+    """
+    (Re)read the primary screen size and the numbered-grid dimensions
+    derived from it. Runs at import and again if a capture comes back at
+    a different size (resolution change).
+    """
+    global SCREEN_W, SCREEN_H, CELLS_PER_ROW, ROWS, TOTAL_CELLS
+    SCREEN_W, SCREEN_H = pyautogui.size()
+    # the overlay numbers partial cells at the right/bottom edge too
+    CELLS_PER_ROW = -(-SCREEN_W // GRID_CELL_SIZE)
+    ROWS = -(-SCREEN_H // GRID_CELL_SIZE)
+    TOTAL_CELLS = CELLS_PER_ROW * ROWS
+
+
+refresh_screen_metrics()
+
+# The vision model gets a JPEG; the full PNG is only written to disk when
+# asked for (raw_screenshot, or SCREENPILOT_SAVE_SCREENSHOTS=1 for debugging)
+VISION_JPEG_QUALITY = 70
+VISION_MAX_SIDE = 1280  # longest side of the image sent to the vision model
+SAVE_SCREENSHOTS = os.getenv("SCREENPILOT_SAVE_SCREENSHOTS") == "1"
+PNG_COMPRESS_LEVEL = 1  # debug PNGs: fast zlib level, a bigger file is fine
+
+# PNG writes run here, overlapping the JPEG encode and the vision API call
+_io_pool = ThreadPoolExecutor(max_workers=2)
+
+# One long-lived mss grabber (reuses its OS capture buffer between grabs).
+# monitors[1] is the primary screen, the same one pyautogui clicks on.
+_sct = mss.mss()
+
+# capture_and_describe_regions fans its mini-model calls out over this pool
+MAX_VISION_REGIONS = 6
+_vision_pool = ThreadPoolExecutor(max_workers=MAX_VISION_REGIONS)
 
 api_key = os.getenv("OPENAI_API_KEY")
 if not api_key:
     raise RuntimeError("Please set the OPENAI_API_KEY environment variable (your OpenAI API key).")
 
-client = OpenAI(api_key=api_key)
+# One keep-alive connection pool for every call in this module (HTTP/2 when
+# h2 is installed). The transport retries failed connects; the SDK retries
+# 429/5xx with exponential backoff.
+http_client = httpx.Client(
+    transport=httpx.HTTPTransport(
+        http2=HTTP2,
+        retries=2,
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+    ),
+    timeout=60,
+)
+client = OpenAI(api_key=api_key, http_client=http_client, max_retries=3)
 
 # =====================
 # Grid overlay helper
 # =====================
 
-def _overlay_numbered_grid(img: Image.Image, cell_size: int = GRID_CELL_SIZE) -> Image.Image:
+@functools.lru_cache(maxsize=4)
+def _load_font(family: str, size: int):
     """
-    Overlay a semi-transparent grid and cell index numbers over the screenshot,
-    so the vision model can refer to numbered cells.
+    Load a TrueType font once per (family, size); falls back to PIL's
+    built-in font if the file isn't available.
+    """
+    try:
+        return ImageFont.truetype(family, size)
+    except Exception:
+        return ImageFont.load_default()
 
-    Cell indexing:
-      - Top-left cell is index 0
-      - Increase left-to-right, then top-to-bottom (row-major)
-      - Each cell is cell_size x cell_size pixels
+
+_TEXT_PROBE = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+
+
+@functools.lru_cache(maxsize=256)
+def _char_advance(ch: str, font) -> float:
+    return _TEXT_PROBE.textlength(ch, font=font)
+
+
+@functools.lru_cache(maxsize=16)
+def _digits_height(font) -> int:
+    bbox = _TEXT_PROBE.textbbox((0, 0), "0123456789", font=font)
+    return bbox[3] - bbox[1]
+
+
+def _text_size(text: str, font) -> tuple[float, int]:
     """
-    w, h = img.size
-    overlay = Image.new("RGBA", img.size, (0, 0, 0, 0))
-    draw = ImageDraw.Draw(overlay)
+    Approximate (width, height) of a grid label in font. Every label is a
+    different string, so the metrics are cached per digit instead: width is
+    the sum of the digits' advances, height is the digits' common height.
+    """
+    return sum(_char_advance(ch, font) for ch in text), _digits_height(font)
+
+
+@functools.lru_cache(maxsize=2)
+def _grid_overlay(size: tuple[int, int], cell_size: int = GRID_CELL_SIZE) -> Image.Image:
+    """
+    Build the transparent grid + cell-index layer for a screen size.
+    It only depends on (size, cell_size), so it is drawn once per
+    resolution and reused for every screenshot.
+    """
+    w, h = size
 
     line_color = (255, 255, 255, 80)
     text_color = (255, 255, 255, 160)
-    line_width = 1
     font_size = 18
 
-    try:
-        font = ImageFont.truetype("arial.ttf", font_size)
-    except Exception:
-        font = ImageFont.load_default()
-
-    # Draw grid lines
-    for x in range(0, w, cell_size):
-        draw.line((x, 0, x, h), fill=line_color, width=line_width)
-    for y in range(0, h, cell_size):
-        draw.line((0, y, w, y), fill=line_color, width=line_width)
-
-    # Draw cell indices
-    cell_index = 0
-    for y in range(0, h, cell_size):
-        for x in range(0, w, cell_size):
+    font = _load_font("arial.ttf", font_size)
+
+    # Draw grid lines: every 1px line in two strided writes
+    arr = np.zeros((h, w, 4), dtype=np.uint8)
+    arr[:, ::cell_size] = line_color
+    arr[::cell_size, :] = line_color
+    overlay = Image.fromarray(arr, "RGBA")
+    draw = ImageDraw.Draw(overlay)
+
+    # Draw cell indices (sparse: every GRID_LABEL_EVERY-th cell in both
+    # directions, which keeps the image cleaner and the JPEG smaller)
+    cells_per_row = len(range(0, w, cell_size))
+    for row, y in enumerate(range(0, h, cell_size)):
+        if row % GRID_LABEL_EVERY:
+            continue
+        for col, x in enumerate(range(0, w, cell_size)):
+            if col % GRID_LABEL_EVERY:
+                continue
             center_x = x + cell_size // 2
             center_y = y + cell_size // 2
-            text = str(cell_index)
+            text = str(row * cells_per_row + col)
 
-            bbox = draw.textbbox((0, 0), text, font=font)
-            tw = bbox[2] - bbox[0]
-            th = bbox[3] - bbox[1]
+            tw, th = _text_size(text, font)
 
             draw.text(
                 (center_x - tw / 2, center_y - th / 2),
@@ -78,119 +189,182 @@ def _overlay_numbered_grid(img: Image.Image, cell_size: int = GRID_CELL_SIZE) ->
                 font=font,
             )
 
-            cell_index += 1
+    return overlay
 
-    # Composite overlay on top of original screenshot
-    if img.mode != "RGBA":
-        base = img.convert("RGBA")
+
+def _overlay_numbered_grid(img: Image.Image, cell_size: int = GRID_CELL_SIZE,
+                           offset: tuple[int, int] = (0, 0)) -> Image.Image:
+    """
+    Overlay a semi-transparent grid and cell index numbers over the screenshot,
+    so the vision model can refer to numbered cells.
+
+    Cell indexing:
+      - Top-left cell is index 0
+      - Increase left-to-right, then top-to-bottom (row-major)
+      - Each cell is cell_size x cell_size pixels
+
+    Draws onto img in place (using the cached overlay's alpha as the mask)
+    and returns it. For a crop of the screen, offset is its top-left corner:
+    the matching piece of the full-screen overlay is used, so labels keep
+    their global indices.
+    """
+    if offset == (0, 0):
+        overlay = _grid_overlay(img.size, cell_size)
     else:
-        base = img
-    result = Image.alpha_composite(base, overlay)
-    return result
+        x, y = offset
+        overlay = _grid_overlay((SCREEN_W, SCREEN_H), cell_size).crop(
+            (x, y, x + img.width, y + img.height)
+        )
+    img.paste(overlay, (0, 0), overlay)
+    return img
 
 # =====================
 # Screenshot helpers
 # =====================
 
-def _take_screenshot():
+def _foreground_window_rect():
+    """
+    (left, top, right, bottom) of the foreground window, clipped to the
+    primary screen. None off Windows or if there's no usable window.
+    """
+    if sys.platform != "win32":
+        return None
+    user32 = ctypes.windll.user32
+    hwnd = user32.GetForegroundWindow()
+    rect = ctypes.wintypes.RECT()
+    if not hwnd or not user32.GetWindowRect(hwnd, ctypes.byref(rect)):
+        return None
+    # maximized windows report a few px past the screen edge
+    left, top = max(0, rect.left), max(0, rect.top)
+    right, bottom = min(SCREEN_W, rect.right), min(SCREEN_H, rect.bottom)
+    if right - left < GRID_CELL_SIZE or bottom - top < GRID_CELL_SIZE:
+        return None
+    return left, top, right, bottom
+
+
+def _capture_grid_image(save_png: bool = SAVE_SCREENSHOTS, bbox=None):
+    """
+    Take a screenshot (full screen, or just bbox=(left, top, right, bottom))
+    with the numbered grid drawn on.
+    Returns (image, png_path or None); the PNG is written in the background.
+    """
+    monitor = _sct.monitors[1]
+    if bbox is not None:
+        left, top, right, bottom = bbox
+        monitor = {
+            "left": monitor["left"] + left,
+            "top": monitor["top"] + top,
+            "width": right - left,
+            "height": bottom - top,
+        }
+    shot = _sct.grab(monitor)
+    # decode BGRA straight to RGB in C, skipping mss's own .rgb conversion
+    raw_img = Image.frombytes("RGB", shot.size, shot.bgra, "raw", "BGRX")
+    if bbox is None and raw_img.size != (SCREEN_W, SCREEN_H):
+        refresh_screen_metrics()
+    offset = (bbox[0], bbox[1]) if bbox is not None else (0, 0)
+    img_with_grid = _overlay_numbered_grid(raw_img, GRID_CELL_SIZE, offset)
+
+    filename = None
+    if save_png:
+        # millisecond stamp: two shots in one second mustn't write the same file
+        ts = int(time.time() * 1000)
+        filename = f"screen_{ts}.png"
+        _io_pool.submit(img_with_grid.save, filename, "PNG", compress_level=PNG_COMPRESS_LEVEL)
+    return img_with_grid, filename
+
+
+def _jpeg_b64(img: Image.Image, max_side: int = VISION_MAX_SIDE) -> str:
+    """
+    Base64 JPEG of img for the vision model, at most max_side px.
+    Resize, channel swap and encode all run in cv2 (libjpeg-turbo) on a
+    NumPy copy of img, so a PNG still being written from img isn't touched.
+    """
+    rgb = np.asarray(img)
+    h, w = rgb.shape[:2]
+    scale = min(1.0, max_side / max(w, h))
+    if scale < 1.0:
+        rgb = cv2.resize(rgb, (round(w * scale), round(h * scale)), interpolation=cv2.INTER_LINEAR)
+    bgr = cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
+    ok, jpg = cv2.imencode(".jpg", bgr, [int(cv2.IMWRITE_JPEG_QUALITY), VISION_JPEG_QUALITY])
+    if not ok:
+        raise RuntimeError("JPEG encoding failed")
+    return base64.b64encode(jpg).decode("ascii")
+
+
+def _take_screenshot(save_png: bool = SAVE_SCREENSHOTS, encode: bool = True):
     """
     Take a screenshot of the full screen, overlay a numbered grid, and
-    return its path and base64-encoded PNG.
+    return its path and base64-encoded JPEG.
 
     Returns:
-        path: str - file path to PNG
+        path: str | None - file path to PNG (None unless save_png)
         width: int
         height: int
-        b64: str - base64-encoded PNG (with grid overlay)
+        b64: str | None - base64-encoded JPEG (with grid overlay, at most
+             VISION_MAX_SIDE px), None unless encode
     """
-    ts = int(time.time())
-    filename = f"screen_{ts}.png"
-
-    raw_img = pyautogui.screenshot()
-    w, h = raw_img.size
-
-    img_with_grid = _overlay_numbered_grid(raw_img, GRID_CELL_SIZE)
-    img_with_grid.save(filename, "PNG")
-
-    buffer = BytesIO()
-    img_with_grid.save(buffer, format="PNG")
-    b64 = base64.b64encode(buffer.getvalue()).decode("utf-8")
-
+    img_with_grid, filename = _capture_grid_image(save_png)
+    w, h = img_with_grid.size
+    # click math keeps using the real screen size; only the model sees
+    # the smaller image
+    b64 = _jpeg_b64(img_with_grid) if encode else None
     return filename, w, h, b64
 
 # =====================
 # Vision / screen summarizer tool
 # =====================
 
-def capture_and_describe_screen(task_hint: str | None = None,
-                                grid_rows: int = 3,
-                                grid_cols: int = 3):
+SCREEN_SUMMARIZER_PROMPT = (
+    "You are ScreenSummarizer, a helper for another agent that will control the computer.\n"
+    "You receive: (1) the user's current task in words, and (2) a screenshot of the whole screen, "
+    "with a semi-transparent numbered grid overlay.\n\n"
+    "GRID DETAILS:\n"
+    "- Each grid cell is 50x50 pixels.\n"
+    "- Cells are numbered in row-major order (left-to-right, then top-to-bottom).\n"
+    "- Top-left cell index is 0.\n"
+    "- The overlaid numbers you see correspond to this index.\n"
+    f"- Only one cell in every {GRID_LABEL_EVERY} across and down is labeled. For an unlabeled cell, take the "
+    "nearest label above-left of it and add the column offset plus (row offset x cells_per_row); "
+    "cells_per_row is given in the user message.\n\n"
+    "You also receive a logical grid size: grid_rows x grid_cols, which is separate from the 50px numbered grid.\n"
+    "Your job: return a single JSON object with keys:\n"
+    "{\n"
+    '  \"summary\": string,\n'
+    '  \"notable_ui\": [\n'
+    "    {\n"
+    '      \"id\": string,\n'
+    '      \"role\": string,\n'
+    '      \"label\": string,\n'
+    '      \"approx_grid_cell\": [r, c],\n'
+    '      \"numbered_cell_index\": integer (optional, if you can read the 50px grid index),\n'
+    '      \"notes\": string\n'
+    "    }, ...\n"
+    "  ],\n"
+    '  \"ocr_text_snippets\": [string, ...],\n'
+    '  \"suggested_next_actions\": [string, ...]\n'
+    "}\n\n"
+    "Define the logical grid as:\n"
+    "- The visible screen is divided into grid_rows x grid_cols.\n"
+    "- Top-left corner is cell [0,0]. Bottom-right is [grid_rows-1, grid_cols-1].\n"
+    "- For each notable UI element, estimate which logical grid cell its center is in.\n\n"
+    "If you can work out the 50px grid index where an element sits (from a label, or a nearby label "
+    "plus offsets), include \"numbered_cell_index\" in that element.\n\n"
+    "Be concise but informative. DO NOT include any comments outside the JSON. "
+    "Return strictly valid JSON."
+)
+
+
+def _describe_one(b64: str, user_text: str, detail: str = "low") -> dict:
     """
-    Core vision tool.
-
-    1. Takes a screenshot and overlays a numbered grid (50px cells).
-    2. Sends it to a mini model with instructions to:
-       - Describe the screen.
-       - Detect important UI elements.
-       - Map them into a logical grid (rows x cols) AND
-         also, when possible, into a numbered-grid index.
-    3. Returns structured JSON the main agent can reason over.
-
-    Uses model: gpt-4.1-mini
+    One gpt-4.1-mini call: a base64 JPEG plus instructions in, the
+    ScreenSummarizer JSON (or an error-shaped stand-in) out.
     """
-    path, w, h, b64 = _take_screenshot()
-    img_url = f"data:image/png;base64,{b64}"
-
-    task_text = task_hint or "No specific task provided; describe the screen in a useful way."
-
-    system_msg = (
-        "You are ScreenSummarizer, a helper for another agent that will control the computer.\n"
-        "You receive: (1) the user's current task in words, and (2) a screenshot of the whole screen, "
-        "with a semi-transparent numbered grid overlay.\n\n"
-        "GRID DETAILS:\n"
-        "- Each grid cell is 50x50 pixels.\n"
-        "- Cells are numbered in row-major order (left-to-right, then top-to-bottom).\n"
-        "- Top-left cell index is 0.\n"
-        "- The overlaid numbers you see correspond to this index.\n\n"
-        "You also receive a logical grid size: grid_rows x grid_cols, which is separate from the 50px numbered grid.\n"
-        "Your job: return a single JSON object with keys:\n"
-        "{\n"
-        '  \"summary\": string,\n'
-        '  \"notable_ui\": [\n'
-        "    {\n"
-        '      \"id\": string,\n'
-        '      \"role\": string,\n'
-        '      \"label\": string,\n'
-        '      \"approx_grid_cell\": [r, c],\n'
-        '      \"numbered_cell_index\": integer (optional, if you can read the 50px grid index),\n'
-        '      \"notes\": string\n'
-        "    }, ...\n"
-        "  ],\n"
-        '  \"ocr_text_snippets\": [string, ...],\n'
-        '  \"suggested_next_actions\": [string, ...]\n'
-        "}\n\n"
-        "Define the logical grid as:\n"
-        "- The visible screen is divided into grid_rows x grid_cols.\n"
-        "- Top-left corner is cell [0,0]. Bottom-right is [grid_rows-1, grid_cols-1].\n"
-        "- For each notable UI element, estimate which logical grid cell its center is in.\n\n"
-        "If you can see the cell number text from the 50px grid overlay where an element sits, "
-        "include \"numbered_cell_index\" in that element.\n\n"
-        "Be concise but informative. DO NOT include any comments outside the JSON. "
-        "Return strictly valid JSON."
-    )
-
     user_content = [
-        {
-            "type": "text",
-            "text": (
-                f"User task: {task_text}\n"
-                f"Logical grid size: rows={grid_rows}, cols={grid_cols}.\n"
-                "Now analyze the screenshot (with numbered grid) and respond with the JSON described in the system message."
-            ),
-        },
+        {"type": "text", "text": user_text},
         {
             "type": "image_url",
-            "image_url": {"url": img_url},
+            "image_url": {"url": f"data:image/jpeg;base64,{b64}", "detail": detail},
         },
     ]
 
@@ -198,15 +372,15 @@ def capture_and_describe_screen(task_hint: str | None = None,
         mini_completion = client.chat.completions.create(
             model="gpt-4.1-mini",
             messages=[
-                {"role": "system", "content": system_msg},
+                {"role": "system", "content": SCREEN_SUMMARIZER_PROMPT},
                 {"role": "user", "content": user_content},
             ],
             response_format={"type": "json_object"},
         )
         content = mini_completion.choices[0].message.content
-        parsed = json.loads(content)
+        return _json_loads(content)
     except Exception as e:
-        parsed = {
+        return {
             "error": f"screen_summarizer_failed: {str(e)}",
             "summary": "Error summarizing screen.",
             "notable_ui": [],
@@ -214,21 +388,216 @@ def capture_and_describe_screen(task_hint: str | None = None,
             "suggested_next_actions": [],
         }
 
+
+# Repeat describes of an unchanged screen (e.g. polling while something
+# loads) reuse the last answer. Any action tool sets _screen_dirty, so a
+# cached answer is only reused across pure waits.
+DHASH_SIZE = 16
+_screen_dirty = True
+_last_describe = None  # (dhash, query args, parsed result)
+
+# (left, top, width, height) the last capture_and_describe_screen covered;
+# click_grid_cell maps its logical rows/cols onto this area
+_grid_area = None
+
+
+def _dhash(img: Image.Image) -> bytes:
+    """
+    Difference hash: DHASH_SIZE x DHASH_SIZE bits of "is this pixel
+    brighter than its right neighbour" on a tiny grayscale thumbnail.
+    """
+    small = img.convert("L").resize((DHASH_SIZE + 1, DHASH_SIZE), Image.BOX)
+    arr = np.asarray(small, dtype=np.int16)
+    return np.packbits(arr[:, 1:] > arr[:, :-1]).tobytes()
+
+
+def _changes_screen(fn):
+    """
+    Mark the screen dirty after an action tool runs, so the next
+    capture_and_describe_screen can't be served from the cache.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        global _screen_dirty
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _screen_dirty = True
+    return wrapper
+
+
+def capture_and_describe_screen(task_hint: str | None = None,
+                                grid_rows: int = 3,
+                                grid_cols: int = 3,
+                                detail: str = "low",
+                                focus_window: bool = False):
+    """
+    Core vision tool.
+
+    1. Takes a screenshot and overlays a numbered grid (50px cells).
+    2. Sends it to a mini model with instructions to:
+       - Describe the screen.
+       - Detect important UI elements.
+       - Map them into a logical grid (rows x cols) AND
+         also, when possible, into a numbered-grid index.
+    3. Returns structured JSON the main agent can reason over.
+
+    detail="low" is a fixed, small image budget and is enough to find things
+    on screen; "high" is needed to reliably read the numbered-cell labels.
+
+    focus_window=True captures only the foreground window (Windows), so
+    fewer pixels go through every later step. Numbered-cell labels keep
+    their full-screen indices; the logical grid covers just the window.
+
+    Uses model: gpt-4.1-mini
+    """
+    global _screen_dirty, _last_describe, _grid_area
+    bbox = _foreground_window_rect() if focus_window else None
+    img, path = _capture_grid_image(bbox=bbox)
+    w, h = img.size
+    left, top = (bbox[0], bbox[1]) if bbox is not None else (0, 0)
+    _grid_area = (left, top, w, h)
+
+    task_text = task_hint or "No specific task provided; describe the screen in a useful way."
+    scope_text = ""
+    if bbox is not None:
+        scope_text = (
+            f"This image shows ONLY the active window, at x={left}..{left + w}, y={top}..{top + h} "
+            f"of a {SCREEN_W}x{SCREEN_H} screen; the numbered labels are still full-screen indices "
+            "and the logical grid covers this window only.\n"
+        )
+
+    dhash = _dhash(img)
+    query = (task_text, grid_rows, grid_cols, detail, bbox)
+    cached = (
+        not _screen_dirty
+        and _last_describe is not None
+        and _last_describe[0] == dhash
+        and _last_describe[1] == query
+    )
+    if cached:
+        parsed = copy.deepcopy(_last_describe[2])
+    else:
+        parsed = _describe_one(
+            _jpeg_b64(img),
+            (
+                f"User task: {task_text}\n"
+                f"{scope_text}"
+                f"Logical grid size: rows={grid_rows}, cols={grid_cols}.\n"
+                f"Numbered grid: cells_per_row={CELLS_PER_ROW}.\n"
+                "Now analyze the screenshot (with numbered grid) and respond with the JSON described in the system message."
+            ),
+            detail,
+        )
+        if "error" not in parsed:
+            _last_describe = (dhash, query, copy.deepcopy(parsed))
+            _screen_dirty = False
+
     parsed["_meta"] = {
         "screenshot_path": path,
         "viewport": {"width": w, "height": h},
+        "crop_offset": [left, top],
         "grid": {"rows": grid_rows, "cols": grid_cols},
         "numbered_grid": {"cell_size_pixels": GRID_CELL_SIZE},
+        "detail": detail,
+        "cached": cached,
     }
 
     return parsed
 
 
+def capture_and_describe_regions(regions: list[dict],
+                                 task_hint: str | None = None,
+                                 grid_rows: int = 2,
+                                 grid_cols: int = 2,
+                                 detail: str = "low"):
+    """
+    Close-up version of capture_and_describe_screen.
+
+    Takes ONE screenshot, crops each region {x, y, width, height, hint?}
+    (screen pixels) and describes all crops with concurrent gpt-4.1-mini
+    calls, so N regions cost about one call's latency.
+
+    Each notable_ui item gets "region" (index into regions) and
+    "approx_screen_xy": the screen position of its approx_grid_cell center,
+    usable directly with click(x, y). numbered_cell_index stays global,
+    since the crops keep the full-screen overlay labels.
+    """
+    img, path = _capture_grid_image()
+    w, h = img.size
+    task_text = task_hint or "No specific task provided; describe the region in a useful way."
+
+    boxes = []
+    jobs = []
+    for r in regions[:MAX_VISION_REGIONS]:
+        x0 = max(0, int(r.get("x", 0)))
+        y0 = max(0, int(r.get("y", 0)))
+        x1 = min(w, x0 + int(r.get("width", 0)))
+        y1 = min(h, y0 + int(r.get("height", 0)))
+        if x1 <= x0 or y1 <= y0:
+            continue
+        hint = r.get("hint") or task_text
+        boxes.append((x0, y0, x1, y1))
+        jobs.append((
+            _jpeg_b64(img.crop((x0, y0, x1, y1))),
+            (
+                f"User task: {hint}\n"
+                f"This image is a CROP of the screen covering x={x0}..{x1}, y={y0}..{y1} "
+                f"(full screen is {w}x{h}). The logical grid applies to this crop only.\n"
+                f"Logical grid size: rows={grid_rows}, cols={grid_cols}.\n"
+                f"Numbered grid: cells_per_row={CELLS_PER_ROW}.\n"
+                "Now analyze the crop (with numbered grid) and respond with the JSON described in the system message."
+            ),
+            detail,
+        ))
+
+    results = list(_vision_pool.map(lambda job: _describe_one(*job), jobs))
+
+    merged = {
+        "regions": [],
+        "notable_ui": [],
+        "ocr_text_snippets": [],
+        "suggested_next_actions": [],
+    }
+    for i, ((x0, y0, x1, y1), parsed) in enumerate(zip(boxes, results)):
+        region = {"bbox": [x0, y0, x1, y1], "summary": parsed.get("summary")}
+        if "error" in parsed:
+            region["error"] = parsed["error"]
+        merged["regions"].append(region)
+
+        cell_w = (x1 - x0) / grid_cols
+        cell_h = (y1 - y0) / grid_rows
+        for item in parsed.get("notable_ui") or []:
+            item["region"] = i
+            cell = item.get("approx_grid_cell")
+            if isinstance(cell, list) and len(cell) == 2:
+                try:
+                    row, col = int(cell[0]), int(cell[1])
+                    item["approx_screen_xy"] = [
+                        int(x0 + (col + 0.5) * cell_w),
+                        int(y0 + (row + 0.5) * cell_h),
+                    ]
+                except (TypeError, ValueError):
+                    pass
+            merged["notable_ui"].append(item)
+        merged["ocr_text_snippets"] += parsed.get("ocr_text_snippets") or []
+        merged["suggested_next_actions"] += parsed.get("suggested_next_actions") or []
+
+    merged["_meta"] = {
+        "screenshot_path": path,
+        "viewport": {"width": w, "height": h},
+        "grid": {"rows": grid_rows, "cols": grid_cols, "per_region": True},
+        "numbered_grid": {"cell_size_pixels": GRID_CELL_SIZE},
+        "detail": detail,
+    }
+    return merged
+
+
 def raw_screenshot():
     """
     Simple screenshot tool: just capture (with grid overlay) and return basic info.
     """
-    path, w, h, _ = _take_screenshot()
+    path, w, h, _ = _take_screenshot(save_png=True, encode=False)
     return {
         "status": "ok",
         "path": path,
@@ -240,23 +609,25 @@ def raw_screenshot():
 # Control tools (mouse / keyboard)
 # =====================
 
+@_changes_screen
 def move_mouse(x: int, y: int, duration: float = 0.0):
     """
     Move mouse to absolute screen coordinates (x, y).
     """
-    pyautogui.moveTo(x, y, duration=duration)
+    if duration:
+        pyautogui.moveTo(x, y, duration=duration)  # smooth moves stay on pyautogui
+    else:
+        input_backend.move(x, y)
     return {"status": "ok", "x": x, "y": y, "duration": duration}
 
 
+@_changes_screen
 def click(x: int | None = None, y: int | None = None, button: str = "left",
           clicks: int = 1, interval: float = 0.0):
     """
     Click at (x, y) if given, else at current position.
     """
-    if x is not None and y is not None:
-        pyautogui.click(x=x, y=y, clicks=clicks, interval=interval, button=button)
-    else:
-        pyautogui.click(clicks=clicks, interval=interval, button=button)
+    input_backend.click(x, y, button=button, clicks=clicks, interval=interval)
     return {
         "status": "ok",
         "x": x,
@@ -267,6 +638,7 @@ def click(x: int | None = None, y: int | None = None, button: str = "left",
     }
 
 
+@_changes_screen
 def double_click(x: int | None = None, y: int | None = None, button: str = "left"):
     """
     Double-click at the CURRENT mouse position.
@@ -274,7 +646,7 @@ def double_click(x: int | None = None, y: int | None = None, button: str = "left
     NOTE: We intentionally ignore x, y to avoid the model trying to move to
     (0, 0) and triggering the PyAutoGUI failsafe corner.
     """
-    pyautogui.click(clicks=2, interval=0.1, button=button)
+    input_backend.click(button=button, clicks=2, interval=0.1)
     return {
         "status": "ok",
         "x": None,
@@ -286,6 +658,7 @@ def double_click(x: int | None = None, y: int | None = None, button: str = "left
     }
 
 
+@_changes_screen
 def click_grid_cell(row: int,
                     col: int,
                     rows: int,
@@ -298,19 +671,21 @@ def click_grid_cell(row: int,
 
     - rows, cols: total grid dimensions used in capture_and_describe_screen.
     - x_offset, y_offset: relative offset from center in range [-0.5, +0.5] of cell size.
-    """
-    screen_w, screen_h = pyautogui.size()
 
-    cell_w = screen_w / cols
-    cell_h = screen_h / rows
+    The grid covers the same area as the last capture_and_describe_screen
+    (the whole screen, or the window if it used focus_window).
+    """
+    left, top, area_w, area_h = _grid_area or (0, 0, SCREEN_W, SCREEN_H)
+    cell_w = area_w / cols
+    cell_h = area_h / rows
 
-    center_x = (col + 0.5) * cell_w
-    center_y = (row + 0.5) * cell_h
+    center_x = left + (col + 0.5) * cell_w
+    center_y = top + (row + 0.5) * cell_h
 
     x = int(center_x + x_offset * cell_w)
     y = int(center_y + y_offset * cell_h)
 
-    pyautogui.click(x=x, y=y, button=button)
+    input_backend.click(x, y, button=button)
     return {
         "status": "ok",
         "row": row,
@@ -323,6 +698,7 @@ def click_grid_cell(row: int,
     }
 
 
+@_changes_screen
 def click_numbered_cell(index: int,
                         button: str = "left",
                         clicks: int = 2,
@@ -332,26 +708,21 @@ def click_numbered_cell(index: int,
 
     - index: 0-based cell index as drawn on the overlay (row-major).
     """
-    screen_w, screen_h = pyautogui.size()
-    cells_per_row = screen_w // GRID_CELL_SIZE
-    rows = screen_h // GRID_CELL_SIZE
-    total_cells = cells_per_row * rows
-
-    if index < 0 or index >= total_cells:
+    if index < 0 or index >= TOTAL_CELLS:
         return {
             "error": f"index {index} out of range for screen grid",
-            "cells_per_row": cells_per_row,
-            "rows": rows,
-            "total_cells": total_cells,
+            "cells_per_row": CELLS_PER_ROW,
+            "rows": ROWS,
+            "total_cells": TOTAL_CELLS,
         }
 
-    row = index // cells_per_row
-    col = index % cells_per_row
+    row, col = divmod(index, CELLS_PER_ROW)
 
-    x = col * GRID_CELL_SIZE + GRID_CELL_SIZE // 2
-    y = row * GRID_CELL_SIZE + GRID_CELL_SIZE // 2
+    # partial edge cells: keep the click on screen
+    x = min(col * GRID_CELL_SIZE + GRID_CELL_SIZE // 2, SCREEN_W - 1)
+    y = min(row * GRID_CELL_SIZE + GRID_CELL_SIZE // 2, SCREEN_H - 1)
 
-    pyautogui.click(x=x, y=y, clicks=clicks, interval=interval, button=button)
+    input_backend.click(x, y, button=button, clicks=clicks, interval=interval)
 
     return {
         "status": "ok",
@@ -366,27 +737,31 @@ def click_numbered_cell(index: int,
     }
 
 
-def type_text(text: str, interval: float = 0.02):
+@_changes_screen
+def type_text(text: str, interval: float = 0.0):
     """
     Type text at current focus.
+    interval=0 sends the whole string at once; raise it for apps that drop fast input.
     """
-    pyautogui.write(text, interval=interval)
+    input_backend.type_text(text, interval=interval)
     return {"status": "ok", "text_length": len(text), "interval": interval}
 
 
+@_changes_screen
 def press_key(key: str):
     """
     Press a single key (e.g. 'enter', 'tab', 'esc', 'f5').
     """
-    pyautogui.press(key)
+    input_backend.press(key)
     return {"status": "ok", "key": key}
 
 
+@_changes_screen
 def hotkey(keys: list[str]):
     """
     Press a combination as a hotkey, e.g. ['ctrl', 'l'] or ['win', 's'].
     """
-    pyautogui.hotkey(*keys)
+    input_backend.hotkey(*keys)
     return {"status": "hotkey", "keys": keys}
 
 
@@ -408,6 +783,7 @@ def sleep(seconds: float):
 TOOL_IMPLS = {
     "raw_screenshot": raw_screenshot,
     "capture_and_describe_screen": capture_and_describe_screen,
+    "capture_and_describe_regions": capture_and_describe_regions,
     "move_mouse": move_mouse,
     "click": click,
     "double_click": double_click,
@@ -455,12 +831,79 @@ tools = [
                         "description": "Number of columns in the logical grid.",
                         "default": 3,
                     },
+                    "detail": {
+                        "type": "string",
+                        "enum": ["low", "high"],
+                        "description": "Image detail for the vision model. 'low' is fast and cheap; use 'high' when you need numbered_cell_index for a precise click.",
+                        "default": "low",
+                    },
+                    "focus_window": {
+                        "type": "boolean",
+                        "description": "Capture only the foreground window instead of the whole screen (smaller, faster). Numbered indices stay full-screen.",
+                        "default": False,
+                    },
                 },
                 "required": [],
                 "additionalProperties": False,
             },
         },
     },
+    {
+        "type": "function",
+        "function": {
+            "name": "capture_and_describe_regions",
+            "description": (
+                "Take one screenshot and describe several screen regions at once (close-ups, described in parallel). "
+                "Each notable_ui item includes 'region' and 'approx_screen_xy' (absolute x, y for click)."
+            ),
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "regions": {
+                        "type": "array",
+                        "description": "Up to 6 rectangles in screen pixels.",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "x": {"type": "integer"},
+                                "y": {"type": "integer"},
+                                "width": {"type": "integer"},
+                                "height": {"type": "integer"},
+                                "hint": {
+                                    "type": "string",
+                                    "description": "Optional: what to look for in this region.",
+                                },
+                            },
+                            "required": ["x", "y", "width", "height"],
+                            "additionalProperties": False,
+                        },
+                    },
+                    "task_hint": {
+                        "type": "string",
+                        "description": "Short description of what you're trying to do (used for regions without a hint).",
+                    },
+                    "grid_rows": {
+                        "type": "integer",
+                        "description": "Rows of the logical grid inside EACH region.",
+                        "default": 2,
+                    },
+                    "grid_cols": {
+                        "type": "integer",
+                        "description": "Columns of the logical grid inside EACH region.",
+                        "default": 2,
+                    },
+                    "detail": {
+                        "type": "string",
+                        "enum": ["low", "high"],
+                        "description": "Image detail for the vision model.",
+                        "default": "low",
+                    },
+                },
+                "required": ["regions"],
+                "additionalProperties": False,
+            },
+        },
+    },
     {
         "type": "function",
         "function": {
@@ -604,7 +1047,8 @@ tools = [
                     "text": {"type": "string"},
                     "interval": {
                         "type": "number",
-                        "default": 0.02,
+                        "description": "Seconds between characters; 0 types instantly. Use ~0.02 if an app drops characters.",
+                        "default": 0.0,
                     },
                 },
                 "required": ["text"],
@@ -720,7 +1164,15 @@ GRID MENTAL MODEL
 - Top-left is [0,0]; bottom-right is [rows-1, cols-1].
 - Each 'notable_ui' item contains 'approx_grid_cell': [row, col].
 - Separately, the screenshot overlay has 50px numbered cells with indices (0,1,2,...).
+  Only every 3rd cell across and down carries a label; the summarizer infers the others.
 - When 'numbered_cell_index' is present for an element, prefer click_numbered_cell(index) for higher precision.
+- To look closer at specific parts of the screen (e.g. a toolbar and a dialog), call
+  capture_and_describe_regions with their pixel rectangles; all regions are described in parallel,
+  and 'approx_screen_xy' on each item can be passed straight to click(x, y).
+- capture_and_describe_screen uses a low-detail image by default. Pass detail='high' when you need
+  to read the numbered cells (small targets, precise clicks); low is fine for checking what is on screen.
+- When the task is inside one app window, pass focus_window=True to capture just that window.
+  click_numbered_cell indices work unchanged; click_grid_cell then maps onto that window.
 
 VISION-FIRST RULES
 - Prefer capture_and_describe_screen over random guessing or asking the user.
@@ -758,23 +1210,93 @@ STYLE
 # Single-task agent loop
 # =====================
 
-def run_single_task(user_task: str):
+AGENT_MODEL = "gpt-5.1"
+PROMPT_CACHE_KEY = "screenpilot-v3"
+
+
+def _agent_request(messages: list) -> dict:
     """
-    Runs the screen agent for ONE task.
-    Returns when the model decides it is finished for this task.
+    Body of one planning call. Shared by the live loop and the Batch API
+    input file so both send exactly the same request.
     """
-    messages = [
+    return {
+        "model": AGENT_MODEL,
+        "messages": messages,
+        "tools": tools,
+        "tool_choice": "auto",
+    }
+
+
+def _initial_messages(user_task: str) -> list:
+    # Static prefix first (tools + SYSTEM_PROMPT never change), task text
+    # after it; the loop only appends, so the provider-side prompt cache
+    # keeps hitting on every turn.
+    return [
         {"role": "system", "content": SYSTEM_PROMPT},
         {"role": "user", "content": user_task},
     ]
 
+
+def _log_usage(completion):
+    usage = getattr(completion, "usage", None)
+    if not usage:
+        return
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", 0) or 0
+    print(f"[Usage] prompt={usage.prompt_tokens} cached={cached} completion={usage.completion_tokens}")
+
+
+SCREEN_TOOLS = {"capture_and_describe_screen", "capture_and_describe_regions"}
+KEEP_RECENT_SCREENS = 3
+
+
+def _screen_summary(result: dict) -> str:
+    if result.get("summary"):
+        return result["summary"]
+    parts = [r["summary"] for r in result.get("regions") or [] if r.get("summary")]
+    return "; ".join(parts)
+
+
+def _compact(screen_results: list, keep_recent: int = KEEP_RECENT_SCREENS):
+    """
+    Replace all but the newest keep_recent screen descriptions in the
+    history with a one-line summary, so old screenshot JSON stops being
+    re-sent every turn. tool_call_id is left alone, so the conversation
+    stays valid. Only fires once 2 * keep_recent are unelided, so the
+    prompt prefix (and the provider's cache of it) stays stable in between.
+
+    screen_results holds (tool message, step, summary), oldest first.
+    """
+    if len(screen_results) < 2 * keep_recent:
+        return
+    for tool_msg, step, summary in screen_results[:-keep_recent]:
+        tool_msg["content"] = _json_dumps({"summary": f"screenshot @step{step}: {summary}", "_elided": True})
+    del screen_results[:-keep_recent]
+
+
+def run_single_task(user_task: str, first_completion: ChatCompletion | None = None):
+    """
+    Runs the screen agent for ONE task.
+    Returns when the model decides it is finished for this task.
+
+    first_completion, if given, is used as the answer to the opening request
+    (e.g. one that already came back from the Batch API) instead of calling
+    the model again.
+    """
+    messages = _initial_messages(user_task)
+    screen_results = []
+    step = 0
+
     while True:
-        completion = client.chat.completions.create(
-            model="gpt-5.1",
-            messages=messages,
-            tools=tools,
-            tool_choice="auto",
-        )
+        step += 1
+        if first_completion is not None:
+            completion, first_completion = first_completion, None
+        else:
+            completion = client.chat.completions.create(
+                **_agent_request(messages),
+                extra_body={"prompt_cache_key": PROMPT_CACHE_KEY},
+            )
+        _log_usage(completion)
 
         msg = completion.choices[0].message
         messages.append(msg)
@@ -785,7 +1307,7 @@ def run_single_task(user_task: str):
                 func_name = tool_call.function.name
                 raw_args = tool_call.function.arguments or "{}"
                 try:
-                    args = json.loads(raw_args)
+                    args = _json_loads(raw_args)
                 except json.JSONDecodeError:
                     args = {}
 
@@ -800,11 +1322,16 @@ def run_single_task(user_task: str):
                         tool_result = {"error": str(e)}
 
                 print(f"[Tool Result] {tool_result}")
-                messages.append({
+                tool_msg = {
                     "role": "tool",
                     "tool_call_id": tool_call.id,
-                    "content": json.dumps(tool_result),
-                })
+                    "content": _json_dumps(tool_result),
+                }
+                messages.append(tool_msg)
+                if func_name in SCREEN_TOOLS and isinstance(tool_result, dict) and "error" not in tool_result:
+                    screen_results.append((tool_msg, step, _screen_summary(tool_result)))
+
+            _compact(screen_results)
 
             # Loop again so the model can see tool results
             continue
@@ -830,13 +1357,120 @@ def run_single_task(user_task: str):
             print("\n[Task finished]\n")
         break
 
+# =====================
+# Batch mode (offline runs)
+# =====================
+
+BATCH_POLL_SECS = 30
+BATCH_DONE = {"completed", "failed", "expired", "cancelled"}
+
+
+def load_batch_tasks(path: str) -> list[str]:
+    """
+    Read tasks from a JSONL file: one task per line, either a JSON string
+    or an object with a "task" field. Blank lines are skipped.
+    """
+    tasks = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            tasks.append(item["task"] if isinstance(item, dict) else str(item))
+    return tasks
+
+
+def _submit_batch(tasks: list[str]):
+    """
+    Upload the opening planning request of every task as one Batch API job.
+    custom_id is the task's position in the list.
+    """
+    buf = BytesIO()
+    for i, task in enumerate(tasks):
+        line = {
+            "custom_id": str(i),
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {**_agent_request(_initial_messages(task)), "prompt_cache_key": PROMPT_CACHE_KEY},
+        }
+        buf.write((json.dumps(line) + "\n").encode("utf-8"))
+
+    batch_file = client.files.create(file=("screenpilot_batch.jsonl", buf.getvalue()), purpose="batch")
+    return client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+
+
+def _collect_batch(batch) -> dict[int, ChatCompletion]:
+    """
+    Poll until the batch finishes, then return {task index: completion}
+    for every request that succeeded.
+    """
+    while batch.status not in BATCH_DONE:
+        counts = batch.request_counts
+        done = f"{counts.completed}/{counts.total}" if counts else "?"
+        print(f"[Batch] {batch.id} {batch.status} ({done}), checking again in {BATCH_POLL_SECS}s")
+        time.sleep(BATCH_POLL_SECS)
+        batch = client.batches.retrieve(batch.id)
+
+    print(f"[Batch] {batch.id} {batch.status}")
+    if not batch.output_file_id:
+        return {}
+
+    results = {}
+    for line in client.files.content(batch.output_file_id).text.splitlines():
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        response = item.get("response") or {}
+        if response.get("status_code") == 200:
+            results[int(item["custom_id"])] = ChatCompletion.model_validate(response["body"])
+    return results
+
+
+def run_batch(tasks: list[str]):
+    """
+    Non-interactive path for bulk/regression runs: every task's opening
+    planning request goes through the Batch API (half the price, up to a 24h
+    turnaround), then each task continues in the normal tool loop from its
+    batched answer. Tasks whose batched request failed start with a live call.
+    """
+    if not tasks:
+        print("[Batch] No tasks to run.")
+        return
+
+    batch = _submit_batch(tasks)
+    print(f"[Batch] Submitted {len(tasks)} task(s) as batch {batch.id}")
+    completions = _collect_batch(batch)
+
+    for i, task in enumerate(tasks):
+        print(f"\n=== Batch task {i + 1}/{len(tasks)}: {task} ===")
+        first = completions.get(i)
+        if first is None:
+            print("[Batch] No batched answer for this task, calling the model directly.")
+        run_single_task(task, first_completion=first)
+
 # =====================
 # Main loop
 # =====================
 
 def main():
+    parser = argparse.ArgumentParser(description="ScreenPilot v3")
+    parser.add_argument(
+        "--batch",
+        metavar="TASKS_JSONL",
+        help="Run the tasks in this JSONL file non-interactively, planning through the OpenAI Batch API.",
+    )
+    cli_args = parser.parse_args()
+
     print("ScreenPilot v3 (vision + pyautogui + numbered grid). Move mouse to TOP-LEFT corner to trigger pyautogui failsafe.\n")
     try:
+        if cli_args.batch:
+            run_batch(load_batch_tasks(cli_args.batch))
+            return
         while True:
             user_task = input("Enter your screen task (or type 'exit' to quit): ").strip()
             if user_task.lower() == "exit":
@@ -846,7 +1480,8 @@ def main():
                 continue
             run_single_task(user_task)
     finally:
-        pass
+        http_client.close()
+        _sct.close()
 
 
 if __name__ == "__main__":
@@ -1,3 +1,4 @@
+import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 
 # --- settings ---
@@ -8,24 +9,42 @@ text_color = (255, 0, 0, 200)
 font_size = 20
 # -----------------
 
-img = Image.open("research/input.png").convert("RGBA")
+img = Image.open("research/input.png").convert("RGB")  # a screenshot: no alpha to keep
 w, h = img.size
 
-overlay = Image.new("RGBA", img.size, (0,0,0,0))
-draw = ImageDraw.Draw(overlay)
-
 # load font
 try:
     font = ImageFont.truetype("arial.ttf", font_size)
 except:
     font = ImageFont.load_default()
 
-# draw grid lines
-for x in range(0, w, grid_size):
-    draw.line((x, 0, x, h), fill=line_color, width=line_width)
+# draw grid lines: every line on each axis in one strided write
+arr = np.zeros((h, w, 4), dtype=np.uint8)
+for i in range(line_width):
+    arr[:, i::grid_size] = line_color
+    arr[i::grid_size, :] = line_color
 
-for y in range(0, h, grid_size):
-    draw.line((0, y, w, y), fill=line_color, width=line_width)
+overlay = Image.fromarray(arr, "RGBA")
+draw = ImageDraw.Draw(overlay)
+
+# text size per digit count: digits are the same width in arial (tabular
+# figures), so measuring "0", "00", ... once is enough to center every label
+cols = len(range(0, w, grid_size))
+rows = len(range(0, h, grid_size))
+text_sizes = {}
+for n in range(1, len(str(rows * cols - 1)) + 1):
+    bbox = draw.textbbox((0, 0), "0" * n, font=font)
+    text_sizes[n] = (bbox[2] - bbox[0], bbox[3] - bbox[1])
+
+# every label is a different number, but there are only 10 digits: rasterize
+# each digit once (mask, ink offset from the pen, advance) and build labels
+# by pasting text_color through those masks, the same fill draw.text does
+digit_tiles = {}
+for d in "0123456789":
+    l, t, r, b = font.getbbox(d)
+    mask = Image.new("L", (r - l, b - t), 0)
+    ImageDraw.Draw(mask).text((-l, -t), d, fill=255, font=font)
+    digit_tiles[d] = (mask, l, t, font.getlength(d))
 
 # draw numbers
 cell_index = 0
@@ -37,21 +56,22 @@ for y in range(0, h, grid_size):
 
         text = str(cell_index)
 
-        # get text bounding box
-        bbox = draw.textbbox((0, 0), text, font=font)
-        tw = bbox[2] - bbox[0]
-        th = bbox[3] - bbox[1]
+        tw, th = text_sizes[len(text)]
 
         # draw centered text
-        draw.text(
-            (center_x - tw/2, center_y - th/2),
-            text,
-            fill=text_color,
-            font=font,
-        )
+        pen_x = center_x - tw/2
+        pen_y = center_y - th/2
+        for d in text:
+            mask, l, t, advance = digit_tiles[d]
+            x0 = round(pen_x + l)
+            y0 = round(pen_y + t)
+            overlay.paste(text_color, (x0, y0, x0 + mask.width, y0 + mask.height), mask)
+            pen_x += advance
 
         cell_index += 1
 
-# combine and save
-result = Image.alpha_composite(img, overlay)
-result.save("output_with_grid_numbers.png")
+# blend the overlay into the screenshot in place (its alpha is the mask),
+# no second full-size image; an RGB PNG also saves about twice as fast.
+# The PNG encode is most of the run time now, so zlib runs at level 1
+img.paste(overlay, (0, 0), overlay)
+img.save("output_with_grid_numbers.png", compress_level=1)
@@ -1,17 +1,189 @@
+import os
+import sys
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import cv2
-import pytesseract
-from pytesseract import Output
+import numpy as np
 from PIL import Image
 import pyautogui
 
-pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+# tesseract's own OpenMP threads just contend with each other; parallelism
+# comes from OCRing strips of the screen side by side instead
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
 
-screenshot = pyautogui.screenshot()
-screenshot.save("screenshot.png")
+# EasyOCR (CRAFT detector + CRNN) on a GPU reads a whole screen faster and
+# more accurately than Tesseract on the CPU; without CUDA it's slower, so
+# it's only used when a GPU is there
+try:
+    import easyocr
+    import torch
+    EASYOCR = torch.cuda.is_available()
+except ImportError:
+    EASYOCR = False
 
-def ocr_with_boxes(input_path, output_path):
-    img = cv2.imread(input_path)
-    data = pytesseract.image_to_data(img, lang="eng", output_type=Output.DICT)
+# tesserocr keeps one Tesseract engine in-process; pytesseract starts
+# tesseract.exe (and reloads the language model) on every call
+try:
+    from tesserocr import PyTessBaseAPI, RIL, PSM, OEM, iterate_level
+    TESSEROCR = True
+except ImportError:
+    import pytesseract
+    from pytesseract import Output
+    TESSEROCR = False
+
+TESSERACT_DIR = r'C:\Program Files\Tesseract-OCR'
+OCR_CONFIG = "--oem 1 --psm 6"  # LSTM engine only, one uniform text block (same as Logicv5)
+
+if not TESSEROCR:
+    pytesseract.pytesseract.tesseract_cmd = TESSERACT_DIR + r'\tesseract.exe'
+
+OCR_STRIPS = min(os.cpu_count() or 1, 8)
+MIN_STRIP_HEIGHT = 200
+STRIP_OVERLAP = 30  # px of context past each strip; taller than any line of screen text
+_ocr_pool = ThreadPoolExecutor(max_workers=OCR_STRIPS)  # long-lived, so each thread keeps its engine
+_tess = threading.local()
+
+if EASYOCR:
+    reader = easyocr.Reader(['en'], gpu=True, cudnn_benchmark=True)
+    reader.readtext(np.zeros((600, 800, 3), np.uint8))  # warm-up: CUDA init + cudnn autotune happen here
+
+SAVE_SCREENSHOT = "--save-screenshot" in sys.argv  # also keep the raw capture as screenshot.png
+
+def tesserocr_api():
+    # one engine per thread (an API object isn't thread-safe), eng model loaded once each
+    if not hasattr(_tess, "api"):
+        _tess.api = PyTessBaseAPI(path=TESSERACT_DIR + r'\tessdata', lang="eng",
+                                  psm=PSM.SINGLE_BLOCK, oem=OEM.LSTM_ONLY)
+    return _tess.api
+
+def tesserocr_data(img):
+    # same keys as pytesseract's image_to_data DICT output, one entry per word
+    api = tesserocr_api()
+    api.SetImage(Image.fromarray(img))
+    api.Recognize()
+    data = {'text': [], 'conf': [], 'left': [], 'top': [], 'width': [], 'height': []}
+    for word in iterate_level(api.GetIterator(), RIL.WORD):
+        box = word.BoundingBox(RIL.WORD)
+        if box is None:
+            continue
+        x1, y1, x2, y2 = box
+        data['text'].append(word.GetUTF8Text(RIL.WORD) or "")
+        data['conf'].append(word.Confidence(RIL.WORD))
+        data['left'].append(x1)
+        data['top'].append(y1)
+        data['width'].append(x2 - x1)
+        data['height'].append(y2 - y1)
+    return data
+
+def easyocr_data(img):
+    # readtext gives (4 corner points, text, confidence 0..1) per line of text;
+    # reshape into the image_to_data DICT layout with confidence in 0..100
+    data = {'text': [], 'conf': [], 'left': [], 'top': [], 'width': [], 'height': []}
+    for box, text, conf in reader.readtext(img):
+        xs = [int(p[0]) for p in box]
+        ys = [int(p[1]) for p in box]
+        data['text'].append(text)
+        data['conf'].append(conf * 100)
+        data['left'].append(min(xs))
+        data['top'].append(min(ys))
+        data['width'].append(max(xs) - min(xs))
+        data['height'].append(max(ys) - min(ys))
+    return data
+
+def ocr_data(img):
+    if TESSEROCR:
+        return tesserocr_data(img)
+    return pytesseract.image_to_data(img, lang="eng", config=OCR_CONFIG, output_type=Output.DICT)
+
+def binarize(img):
+    # grayscale + Otsu once for the whole frame: Tesseract's LSTM gets a
+    # clean single-channel image (dark text on light, so dark themes flip)
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    _, bw = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    if bw.mean() < 127:
+        cv2.bitwise_not(bw, dst=bw)
+    return bw
+
+def ocr_strip(img, y0, own_top, own_bottom):
+    # OCR img[y0:...] and keep the words whose top edge falls in this strip's
+    # own band [own_top, own_bottom); the overlap means those are never cut off,
+    # and words owned by a neighbour (or cut by the edge) are dropped
+    data = ocr_data(img)
+    keep = {'text': [], 'conf': [], 'left': [], 'top': [], 'width': [], 'height': []}
+    for i in range(len(data['text'])):
+        top = data['top'][i] + y0
+        if own_top <= top < own_bottom:
+            for key in keep:
+                keep[key].append(top if key == 'top' else data[key][i])
+    return keep
+
+def ocr_tiled(img):
+    # horizontal strips of the screen OCR'd side by side, merged top to bottom
+    h = img.shape[0]
+    n = max(1, min(OCR_STRIPS, h // MIN_STRIP_HEIGHT))
+    if n == 1:
+        return ocr_data(img)
+    bands = [(h * i // n, h * (i + 1) // n) for i in range(n)]
+    futures = []
+    for own_top, own_bottom in bands:
+        y0 = max(0, own_top - STRIP_OVERLAP)
+        y1 = min(h, own_bottom + STRIP_OVERLAP)
+        futures.append(_ocr_pool.submit(ocr_strip, img[y0:y1], y0, own_top, own_bottom))
+    data = {'text': [], 'conf': [], 'left': [], 'top': [], 'width': [], 'height': []}
+    for fut in futures:
+        for key, values in fut.result().items():
+            data[key].extend(values)
+    return data
+
+def parse_tsv(tsv, n_pages):
+    # tesseract's TSV for a list file: one row per box, page_num = 1-based
+    # position in the list; keep the word rows (level 5) in DICT layout
+    pages = [{'text': [], 'conf': [], 'left': [], 'top': [], 'width': [], 'height': []}
+             for _ in range(n_pages)]
+    for line in tsv.splitlines():
+        cols = line.split("\t")
+        if len(cols) < 12 or cols[0] != "5":
+            continue
+        page = int(cols[1]) - 1
+        if not 0 <= page < n_pages:
+            continue
+        d = pages[page]
+        d['left'].append(int(cols[6]))
+        d['top'].append(int(cols[7]))
+        d['width'].append(int(cols[8]))
+        d['height'].append(int(cols[9]))
+        d['conf'].append(float(cols[10]))
+        d['text'].append(cols[11])
+    return pages
+
+def ocr_many(paths):
+    # one data dict per image file. With only the tesseract binary, all of
+    # them go through one process via a list file (model loaded once); the
+    # in-process engines have no startup to save. Either way tesseract gets
+    # the same binarized frames ocr_with_boxes gives it
+    frames = [cv2.imread(path) for path in paths]
+    if EASYOCR or TESSEROCR or len(paths) == 1:
+        return [easyocr_data(f) if EASYOCR else ocr_tiled(binarize(f)) for f in frames]
+    with tempfile.TemporaryDirectory() as tmp:
+        pages = []
+        for i, frame in enumerate(frames):
+            pages.append(os.path.join(tmp, f"{i}.png"))
+            cv2.imwrite(pages[-1], binarize(frame), [cv2.IMWRITE_PNG_COMPRESSION, 1])
+        list_path = os.path.join(tmp, "pages.txt")
+        with open(list_path, "w") as f:
+            f.write("\n".join(pages))
+        cmd = [pytesseract.pytesseract.tesseract_cmd, list_path, "stdout", "-l", "eng", *OCR_CONFIG.split(), "tsv"]
+        out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+    return parse_tsv(out, len(paths))
+
+def ocr_with_boxes(img, output_path):
+    # accepts a BGR frame (drawn on in place) or an image file path
+    if isinstance(img, str):
+        img = cv2.imread(img)
+    # the color frame is kept for drawing; Tesseract only sees the binarized copy
+    data = easyocr_data(img) if EASYOCR else ocr_tiled(binarize(img))
 
     n_boxes = len(data['text'])
     for i in range(n_boxes):
@@ -31,5 +203,19 @@ def ocr_with_boxes(input_path, output_path):
     cv2.imwrite(output_path, img)
     return data
 
-data = ocr_with_boxes("screenshot.png", "screenshot_boxes.png")
-print("\n".join([t for t in data['text'] if t.strip() != ""]))
+paths = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+if paths:
+    # image files on the command line are OCR'd as one batch
+    for path, data in zip(paths, ocr_many(paths)):
+        print(f"--- {path}")
+        print("\n".join([t for t in data['text'] if t.strip() != ""]))
+else:
+    # hand the capture to cv2 in memory (one RGB->BGR swap) instead of a PNG
+    # encode, disk write and decode through screenshot.png
+    screenshot = pyautogui.screenshot()
+    frame = cv2.cvtColor(np.asarray(screenshot), cv2.COLOR_RGB2BGR)
+    if SAVE_SCREENSHOT:
+        screenshot.save("screenshot.png")
+
+    data = ocr_with_boxes(frame, "screenshot_boxes.png")
+    print("\n".join([t for t in data['text'] if t.strip() != ""]))
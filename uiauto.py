@@ -1,4 +1,5 @@
 import time
+import numpy as np
 import uiautomation as auto
 import pyautogui
 from PIL import Image, ImageDraw
@@ -8,101 +9,135 @@ SCAN_FOREGROUND_ONLY = True  # True = just the active window, False = whole desk
 MAX_DEPTH = 100000               # higher = deeper scan, but slower
 
 # Dynamically include EVERY ControlType that ends with "Control"
-CLICKABLE_CONTROL_TYPES = {
+CLICKABLE_CONTROL_TYPES = frozenset(
     value
     for name, value in auto.ControlType.__dict__.items()
     if name.endswith("Control")
-}
+)
 
 print("Number of ControlTypes in CLICKABLE_CONTROL_TYPES:", len(CLICKABLE_CONTROL_TYPES))
 
-
-def is_clickable(elem: auto.Control):
+# Everything walk_and_collect / is_clickable reads, fetched in the same
+# cross-process call that returns the elements (one round-trip per parent
+# instead of one per property per element)
+CACHED_PROPERTIES = (
+    auto.PropertyId.NameProperty,
+    auto.PropertyId.BoundingRectangleProperty,
+    auto.PropertyId.ControlTypeProperty,
+    auto.PropertyId.AutomationIdProperty,
+    auto.PropertyId.ClassNameProperty,
+    auto.PropertyId.IsEnabledProperty,
+    auto.PropertyId.IsOffscreenProperty,
+)
+
+# the raw IUIAutomation client; the package's `import *` skips underscore
+# names, so it's reached through the uiautomation submodule
+_uia = auto.uiautomation._AutomationClient.instance().IUIAutomation
+_true_condition = _uia.CreateTrueCondition()
+
+
+def make_cache_request():
+    cache_request = _uia.CreateCacheRequest()
+    for prop in CACHED_PROPERTIES:
+        cache_request.AddProperty(prop)
+    return cache_request
+
+
+def is_clickable(elem, _types=CLICKABLE_CONTROL_TYPES):
     """
     Treat basically everything as clickable if:
-    - it has a valid visible bounding rect, AND
+    - it is enabled, on screen and has a valid bounding rect, AND
     - its control type is ANY ControlType (we added them all), OR
-    - it has Invoke/Selection/ExpandCollapse/Toggle patterns, OR
-    - UIA says it has a clickable point
-    """
-    try:
-        rect = elem.BoundingRectangle
-    except Exception:
-        return False
-
-    if not rect or rect.width() <= 0 or rect.height() <= 0:
-        return False
+    - (custom control types only) UIA says it has a clickable point
 
+    elem is a raw IUIAutomationElement fetched with make_cache_request(),
+    so everything but the clickable point is read from its cache.
+    Runs once per element, so it's kept flat: the type set is bound as a
+    default argument (a local lookup, not a global one) and all cached
+    reads share one try block.
+    """
     try:
-        if not elem.IsEnabled:
+        if not elem.CachedIsEnabled or elem.CachedIsOffscreen:
             return False
-        if elem.IsOffscreen:
+        rect = elem.CachedBoundingRectangle
+        if rect.right <= rect.left or rect.bottom <= rect.top:
             return False
+        # Every standard control type is in the set, so this settles it for
+        # practically everything; no Invoke/Toggle/... pattern probes needed
+        if elem.CachedControlType in _types:
+            return True
+        # Fallback: if UIA can give us a clickable point, call it clickable
+        # (the one live call left; a clickable point can't be cached)
+        _, got_clickable = elem.GetClickablePoint()
+        return bool(got_clickable)
     except Exception:
         return False
 
-    # Now: *any* control type that exists in ControlType is considered clickable
-    if elem.ControlType in CLICKABLE_CONTROL_TYPES:
-        return True
-
-    # Pattern-based checks
-    def has_pattern(getter_name: str) -> bool:
-        try:
-            pat = getattr(elem, getter_name)()
-            return pat is not None
-        except Exception:
-            return False
-
-    if (
-        has_pattern("GetInvokePattern")
-        or has_pattern("GetSelectionItemPattern")
-        or has_pattern("GetExpandCollapsePattern")
-        or has_pattern("GetTogglePattern")
-    ):
-        return True
-
-    # Fallback: if UIA can give us a clickable point, call it clickable
-    try:
-        elem.GetClickablePoint()
-        return True
-    except Exception:
-        pass
 
-    return False
+def cached_children(elem, cache_request):
+    """
+    All children of elem in one FindAllBuildCache call, with their
+    properties and patterns already cached.
+    """
+    found = elem.FindAllBuildCache(auto.TreeScope.Children, _true_condition, cache_request)
+    return [found.GetElement(i) for i in range(found.Length)]
 
 
-def walk_and_collect(root: auto.Control, depth=0, max_depth=5, results=None):
+def walk_and_collect(root, depth=0, max_depth=5, results=None, cache_request=None):
+    """
+    root is an auto.Control or a raw IUIAutomationElement. Depth-first with
+    an explicit stack (same order as walking it recursively), so deep trees
+    don't cost a Python frame per element or hit the recursion limit.
+    """
     if results is None:
         results = []
+    if cache_request is None:
+        cache_request = make_cache_request()
 
     if depth > max_depth:
         return results
 
-    for child in root.GetChildren():
+    elem = getattr(root, "Element", root)
+    stack = [(child, depth) for child in reversed(cached_children(elem, cache_request))]
+
+    while stack:
+        child, level = stack.pop()
         try:
             if is_clickable(child):
-                rect = child.BoundingRectangle
+                rect = child.CachedBoundingRectangle
                 item = {
-                    "name": child.Name,
-                    "control_type": child.ControlTypeName,
+                    "name": child.CachedName,
+                    "control_type": auto.ControlTypeNames.get(child.CachedControlType, ""),
                     "x1": rect.left,
                     "y1": rect.top,
                     "x2": rect.right,
                     "y2": rect.bottom,
-                    "width": rect.width(),
-                    "height": rect.height(),
-                    "automation_id": child.AutomationId,
-                    "class_name": child.ClassName,
+                    "width": rect.right - rect.left,
+                    "height": rect.bottom - rect.top,
+                    "automation_id": child.CachedAutomationId,
+                    "class_name": child.CachedClassName,
                 }
                 results.append(item)
 
-            walk_and_collect(child, depth + 1, max_depth, results)
+            if level < max_depth:
+                stack.extend((c, level + 1) for c in reversed(cached_children(child, cache_request)))
         except Exception:
             continue
 
     return results
 
 
+def rect_arrays(items):
+    """
+    The x1, y1, x2, y2 of walk_and_collect's items as four int32 arrays,
+    so clamping and filtering run once per coordinate.
+    """
+    return tuple(
+        np.fromiter((item[key] for item in items), dtype=np.int32, count=len(items))
+        for key in ("x1", "y1", "x2", "y2")
+    )
+
+
 if __name__ == "__main__":
     print("You have 2 seconds to arrange the screen / active window...")
     time.sleep(2)
@@ -126,29 +161,25 @@ if __name__ == "__main__":
     print(f"Total clickable-ish items found: {len(clickable_items)}")
 
     # Screenshot + overlay
+    # pyautogui already hands back an RGB image, so it's drawn on as-is
     screenshot = pyautogui.screenshot()
-    screenshot = screenshot.convert("RGB")
     draw = ImageDraw.Draw(screenshot)
 
     img_w, img_h = screenshot.size
 
-    for item in clickable_items:
-        x1 = int(item["x1"])
-        y1 = int(item["y1"])
-        x2 = int(item["x2"])
-        y2 = int(item["y2"])
-
-        # Clamp to screenshot bounds
-        x1 = max(0, min(x1, img_w - 1))
-        y1 = max(0, min(y1, img_h - 1))
-        x2 = max(0, min(x2, img_w - 1))
-        y2 = max(0, min(y2, img_h - 1))
-
-        if x2 <= x1 or y2 <= y1:
-            continue
+    # Clamp to screenshot bounds and drop empty boxes for all items at once;
+    # ImageDraw still does the stroking (faster than NumPy strips per box)
+    x1, y1, x2, y2 = rect_arrays(clickable_items)
+    np.clip(x1, 0, img_w - 1, out=x1)
+    np.clip(x2, 0, img_w - 1, out=x2)
+    np.clip(y1, 0, img_h - 1, out=y1)
+    np.clip(y2, 0, img_h - 1, out=y2)
+    keep = (x2 > x1) & (y2 > y1)
 
-        draw.rectangle([(x1, y1), (x2, y2)], outline="red", width=2)
+    for left, top, right, bottom in zip(x1[keep].tolist(), y1[keep].tolist(),
+                                        x2[keep].tolist(), y2[keep].tolist()):
+        draw.rectangle([(left, top), (right, bottom)], outline="red", width=2)
 
     out_path = "clickables_overlay.png"
-    screenshot.save(out_path)
+    screenshot.save(out_path, "PNG", compress_level=1)  # zlib level 1: much faster encode, slightly bigger file
     print(f"Overlay screenshot saved to: {out_path}")